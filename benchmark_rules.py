@@ -0,0 +1,374 @@
+'''
+Measures the throughput of the french rules on a long document.
+The document is parsed once per run outside of the timed sections, so the figures
+only cover the work done by the rules analyzer.
+
+python benchmark_rules.py --spacy_model fr_core_news_lg --input_file article.txt
+python benchmark_rules.py --spacy_model fr_core_news_lg --democrat_directory democrat/test
+'''
+import argparse
+import time
+
+import spacy
+from coreferee.data_model import Mention
+from coreferee.rules import RulesAnalyzerFactory
+from coreferee.training.loaders import DEMOCRATConllLoader
+
+
+def read_text(input_file, repeat=1):
+    with open(input_file, encoding="utf8") as text_file:
+        text = text_file.read()
+    return "\n".join([text] * repeat)
+
+
+def time_function(function, *args, runs=5):
+    '''Returns the best of *runs* timings of function(*args) in seconds'''
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def time_initialize(nlp, text, rules_analyzer, runs=5):
+    '''Returns the number of tokens per second processed by *rules_analyzer.initialize()*.
+    Every run works on a freshly parsed doc.
+    '''
+    total_tokens = 0
+    total_time = 0
+    for _ in range(runs):
+        doc = nlp(text)
+        start = time.perf_counter()
+        rules_analyzer.initialize(doc)
+        total_time += time.perf_counter() - start
+        total_tokens += len(doc)
+    return total_tokens / total_time
+
+
+def benchmark_democrat(nlp, rules_analyzer, corpus_directory, runs=1):
+    '''Measures the throughput of *rules_analyzer.initialize()* on the documents of the
+    DEMOCRAT conll corpus in *corpus_directory*.
+    '''
+    docs = DEMOCRATConllLoader().load(corpus_directory, nlp=nlp, rules_analyzer=rules_analyzer)
+    total_tokens = 0
+    total_time = 0
+    for _ in range(runs):
+        for doc in (nlp(doc.text) for doc in docs):
+            start = time.perf_counter()
+            rules_analyzer.initialize(doc)
+            total_time += time.perf_counter() - start
+            total_tokens += len(doc)
+    print(f'DEMOCRAT: {len(docs)} documents, {total_tokens / total_time:.0f} tokens/sec')
+
+
+def benchmark_lexicon(doc, rules_analyzer, runs=5):
+    '''Micro-benchmark of the word list lookups made by the rules for each token, done on
+    the plain lists and on the compiled lexicon. It only times the lookups: the throughput
+    of the rules themselves is measured by *time_initialize()*.
+    '''
+    lemmas = [token.lemma_ for token in doc]
+    male_names, female_names = rules_analyzer.male_names, rules_analyzer.female_names
+    person_nouns_list = rules_analyzer.entity_noun_dictionary["PER"] + rules_analyzer.person_roles
+    verbs_list = rules_analyzer.verbs_with_personal_subject
+    lexicon = rules_analyzer.compile_lexicon()
+
+    def list_lookups():
+        for lemma in lemmas:
+            lemma in male_names + female_names
+            lemma.lower() in rules_analyzer.entity_noun_dictionary["PER"] + \
+                rules_analyzer.person_roles
+            lemma in verbs_list
+
+    def lexicon_lookups():
+        for lemma in lemmas:
+            lemma in lexicon.first_names
+            lemma.lower() in lexicon.person_nouns
+            lemma in lexicon.verbs_with_personal_subject
+
+    print('Word lists:', len(male_names) + len(female_names), 'names,',
+        len(person_nouns_list), 'person nouns,', len(verbs_list), 'verbs')
+    for label, function in (('lists', list_lookups), ('lexicon', lexicon_lookups)):
+        elapsed = time_function(function, runs=runs)
+        print(f'Word list lookups only, on {label}: {len(lemmas) / elapsed:.0f} lemmas/sec')
+
+
+MORPH_CHECKS = (("Gender", "Masc"), ("Gender", "Fem"), ("Number", "Sing"), ("Number", "Plur"),
+    ("Person", "3"), ("PronType", "Dem"), ("Poss", "Yes"), ("Reflex", "Yes"), ("Number", None))
+
+
+def benchmark_morph(doc, rules_analyzer, runs=5):
+    '''Compares the morphology checks made by the rules for each token when done
+    through the spaCy morphology and on the packed morphology.
+    '''
+    rules_analyzer.get_token_features(doc)
+
+    def morph_checks(has_morph):
+        for token in doc:
+            for tag, value in MORPH_CHECKS:
+                has_morph(token, tag, value)
+
+    for label, has_morph in (('spaCy morphology', rules_analyzer.has_morph),
+            ('packed morphology', rules_analyzer.has_packed_morph)):
+        elapsed = time_function(morph_checks, has_morph, runs=runs)
+        print(f'Morph checks on {label}: {len(doc) / elapsed:.0f} tokens/sec')
+
+
+def get_noun_pairs(doc, rules_analyzer, sentence_window=3):
+    '''Returns the pairs of independent nouns at most *sentence_window* sentences apart,
+    i.e. the noun pairs the rules are asked about.
+    '''
+    sentence_indexes = rules_analyzer.get_sentence_indexes(doc)
+    noun_indexes = rules_analyzer.get_independent_noun_indexes(doc)
+    return [(doc[referred_index], doc[referring_index])
+        for position, referring_index in enumerate(noun_indexes)
+        for referred_index in noun_indexes[:position]
+        if sentence_indexes[referring_index] - sentence_indexes[referred_index] < sentence_window]
+
+
+def benchmark_noun_pairs(doc, rules_analyzer, runs=5):
+    '''Measures the cost per pair of *is_potential_coreferring_noun_pair()*'''
+    rules_analyzer.initialize(doc)
+    pairs = get_noun_pairs(doc, rules_analyzer)
+
+    def noun_pairs():
+        for referred, referring in pairs:
+            rules_analyzer.is_potential_coreferring_noun_pair(referred, referring)
+
+    elapsed = time_function(noun_pairs, runs=runs)
+    print(f'Noun pairs: {len(pairs)} pairs, {elapsed / len(pairs) * 1e6:.1f} µs per pair')
+
+
+def benchmark_candidate_windows(doc, rules_analyzer, runs=5):
+    '''Compares the candidate lists of all potential anaphors of *doc* when gathered by
+    walking the sentences of each anaphor and when sliced from the windows worked out in
+    one pass by *get_anaphor_candidate_windows()*.
+    '''
+    rules_analyzer.initialize(doc)
+    referable_indexes = rules_analyzer.get_referable_indexes(doc).tolist()
+    anaphors = [token for token in doc if rules_analyzer.is_potential_anaphor(token)]
+    distance = rules_analyzer.maximum_anaphora_sentence_referential_distance
+
+    def sentence_walk():
+        sentences = list(doc.sents)
+        for referring in anaphors:
+            sentence_index = sentences.index(referring.sent)
+            window = sentences[max(sentence_index - distance, 0):sentence_index + 1]
+            [index for index in referable_indexes
+                if window[0].start <= index < window[-1].end and index != referring.i]
+
+    def windows():
+        doc_index = rules_analyzer.get_doc_index(doc)
+        doc_index.sentence_starts = doc_index.sentence_indexes = None
+        doc_index.anaphor_candidate_windows.clear()
+        indexes = rules_analyzer.get_referable_indexes(doc)
+        anaphor_indexes, window_starts, window_ends = \
+            rules_analyzer.get_anaphor_candidate_windows(doc)
+        for referring_index, start, end in zip(anaphor_indexes.tolist(),
+                window_starts.tolist(), window_ends.tolist()):
+            candidate_indexes = indexes[start:end]
+            candidate_indexes[candidate_indexes != referring_index]
+
+    for label, function in (('sentence walk', sentence_walk), ('windows', windows)):
+        elapsed = time_function(function, runs=runs)
+        print(f'Anaphor candidates by {label}: {len(anaphors)} anaphors,',
+            f'{elapsed / max(len(anaphors), 1) * 1e6:.1f} µs per anaphor')
+    candidate_count = sum(len(rules_analyzer.get_anaphor_candidate_indexes(referring))
+        for referring in anaphors)
+    agreeing_count = sum(len(rules_analyzer.get_agreeing_candidate_indexes(referring, True))
+        for referring in anaphors)
+    print(f'Agreement buckets: {agreeing_count} of {candidate_count} candidates visited')
+
+
+def benchmark_batched_pairs(doc, rules_analyzer, runs=5):
+    '''Compares the pairs of each potential anaphor with all the independent nouns before
+    it when checked one by one and in one batch per anaphor.
+    '''
+    rules_analyzer.initialize(doc)
+    noun_indexes = rules_analyzer.get_independent_noun_indexes(doc)
+    anaphors = [(token, [Mention(doc[index]) for index in noun_indexes if index < token.i])
+        for token in doc if rules_analyzer.is_potential_anaphor(token)]
+    pair_count = sum(len(referreds) for _, referreds in anaphors)
+
+    def single_pairs():
+        for referring, referreds in anaphors:
+            for referred in referreds:
+                rules_analyzer.is_potential_anaphoric_pair(referred, referring, directly=True)
+
+    def batched_pairs():
+        for referring, referreds in anaphors:
+            rules_analyzer.score_anaphoric_pairs(referring, referreds, directly=True)
+
+    for label, function in (('one by one', single_pairs), ('batched', batched_pairs)):
+        elapsed = time_function(function, runs=runs)
+        print(f'Anaphoric pairs {label}: {pair_count} pairs,',
+            f'{elapsed / pair_count * 1e6:.1f} µs per pair')
+
+
+def benchmark_rule_trace(nlp, text, rules_analyzer, runs=5, sampling_rates=(0.01, 1.0)):
+    '''Compares the throughput of the rules without rule trace and with each of
+    *sampling_rates*, along with the time spent building the trace records.
+    '''
+    rules_analyzer.disable_rule_trace()
+    print(f'Rules without trace: {time_initialize(nlp, text, rules_analyzer, runs=runs):.0f} tokens/sec')
+    try:
+        for sampling_rate in sampling_rates:
+            rule_trace = rules_analyzer.enable_rule_trace(sampling_rate=sampling_rate)
+            tokens_per_second = time_initialize(nlp, text, rules_analyzer, runs=runs)
+            print(f'Rules with trace at {sampling_rate}: {tokens_per_second:.0f} tokens/sec,',
+                rule_trace.sampled_calls, 'sampled calls,',
+                f'{rule_trace.seconds:.3f} s building records')
+    finally:
+        rules_analyzer.disable_rule_trace()
+
+
+def benchmark_stage_orders(doc, rules_analyzer, runs=5):
+    '''Times *is_potential_anaphoric_pair()* on the pairs of each potential anaphor and
+    the independent nouns of its sentence and the previous one, with the stages in their
+    declared order and once ordered from a profiling run on the same pairs.
+    '''
+    rules_analyzer.initialize(doc)
+    sentence_starts = [sentence.start for sentence in doc.sents]
+    noun_indexes = rules_analyzer.get_independent_noun_indexes(doc)
+    pairs = []
+    for sentence_index, sentence in enumerate(doc.sents):
+        window_start = sentence_starts[max(sentence_index - 1, 0)]
+        for token in sentence:
+            if rules_analyzer.is_potential_anaphor(token):
+                pairs.extend((Mention(doc[index]), token) for index in noun_indexes
+                    if window_start <= index < token.i)
+
+    def anaphoric_pairs():
+        for referred, referring in pairs:
+            rules_analyzer.is_potential_anaphoric_pair(referred, referring, directly=True)
+
+    declared_stages = rules_analyzer.anaphoric_pair_stages
+    try:
+        elapsed = time_function(anaphoric_pairs, runs=runs)
+        print(f'Anaphoric pairs: {len(pairs)} pairs, {elapsed / len(pairs) * 1e6:.1f} µs per pair',
+            'with the declared stage order')
+        stage_stats = rules_analyzer.profile_anaphoric_pair_stages()
+        anaphoric_pairs()
+        rules_analyzer.stop_profiling_anaphoric_pair_stages()
+        print(stage_stats.to_text())
+        stages = rules_analyzer.order_anaphoric_pair_stages(stage_stats)
+        elapsed = time_function(anaphoric_pairs, runs=runs)
+        print(f'Anaphoric pairs: {elapsed / len(pairs) * 1e6:.1f} µs per pair with the order',
+            ', '.join(stage[0] for stage in stages))
+    finally:
+        rules_analyzer.anaphoric_pair_stages = declared_stages
+
+
+def benchmark_rule_stats(nlp, text, rules_analyzer, runs=5):
+    '''Compares the throughput of the rules with and without rule statistics and prints
+    the statistics gathered on the document.
+    '''
+    rules_analyzer.disable_rule_stats()
+    print(f'Rules without stats: {time_initialize(nlp, text, rules_analyzer, runs=runs):.0f} tokens/sec')
+    rule_stats = rules_analyzer.enable_rule_stats()
+    try:
+        print(f'Rules with stats: {time_initialize(nlp, text, rules_analyzer, runs=runs):.0f} tokens/sec')
+        print(rule_stats.to_text())
+    finally:
+        rules_analyzer.disable_rule_stats()
+
+
+CE_DERNIER_TEXT = ("Le ministre a rencontré le président de la région. "
+    "Ce dernier a salué la décision du conseil. "
+    "La directrice a écrit à l'avocate de l'entreprise. "
+    "Cette dernière a répondu dans la journée. ")
+
+
+def naive_last_compatible_noun_check(rules_analyzer, referred, referring):
+    '''The backward scan done for 'ce dernier' before the previous-noun index existed'''
+    doc = referring.doc
+    for previous_token_index in range(referring.i - 1, 0, -1):
+        previous_token = doc[previous_token_index]
+        if rules_analyzer.is_independent_noun(previous_token) and \
+            rules_analyzer.is_potential_anaphoric_pair(Mention(previous_token), referring,
+                directly=False):
+            if previous_token_index != referred.root_index:
+                if previous_token.dep_ in ("nmod", "appos"):
+                    continue
+                return False
+            break
+    return True
+
+
+def benchmark_ce_dernier(nlp, rules_analyzer, min_tokens=50000, sample=50, runs=5):
+    '''Times the pairs made of 'ce dernier' and the nouns of the same and previous
+    sentence on a document of at least *min_tokens* tokens. As the former backward scan
+    is quadratic in the document length, it is only timed on the last *sample*
+    occurrences and its figure is given per occurrence.
+    '''
+    repeat = min_tokens // len(nlp(CE_DERNIER_TEXT)) + 1
+    text = CE_DERNIER_TEXT * repeat
+    nlp.max_length = max(nlp.max_length, len(text) + 1)
+    doc = nlp(text)
+    rules_analyzer.initialize(doc)
+    sentence_starts = [sentence.start for sentence in doc.sents]
+    pairs = []
+    for sentence_index, sentence in enumerate(doc.sents):
+        window_start = sentence_starts[max(sentence_index - 1, 0)]
+        for token in sentence:
+            if token.lemma_.lower() != "dernier" or \
+                    not rules_analyzer.is_potential_anaphor(token):
+                continue
+            pairs.append([(Mention(doc[index]), token) for index in
+                rules_analyzer.get_independent_noun_indexes(doc)
+                if window_start <= index < token.i])
+    print('Document:', len(doc), 'tokens,', len(pairs), "occurrences of 'ce dernier'")
+
+    def indexed_pairs(anaphor_pairs):
+        rules_analyzer.get_doc_index(doc).last_compatible_nouns.clear()
+        for candidate_pairs in anaphor_pairs:
+            for referred, referring in candidate_pairs:
+                rules_analyzer.is_potential_anaphoric_pair(referred, referring, directly=True)
+
+    def naive_pairs(anaphor_pairs):
+        for candidate_pairs in anaphor_pairs:
+            for referred, referring in candidate_pairs:
+                naive_last_compatible_noun_check(rules_analyzer, referred, referring)
+
+    elapsed = time_function(indexed_pairs, pairs, runs=runs)
+    print(f"Previous-noun index: {elapsed / len(pairs) * 1000:.3f} ms per 'ce dernier',",
+        f'{elapsed:.2f} s in total')
+    elapsed = time_function(naive_pairs, pairs[-sample:], runs=1)
+    print(f"Backward scan: {elapsed / len(pairs[-sample:]) * 1000:.3f} ms per 'ce dernier'")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the throughput of\
+                                     the french coreferee rules')
+    parser.add_argument('--spacy_model', type=str, default='fr_core_news_lg',
+                        help='name of the spacy model to use. Ex: fr_core_news_md')
+    parser.add_argument('--input_file', type=str,
+                        help='text file containing a long document, e.g. a news article')
+    parser.add_argument('--democrat_directory', type=str,
+                        help='directory containing the conll files of the DEMOCRAT corpus')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='number of times the text is repeated to build the document')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='number of timed runs')
+    args = parser.parse_args()
+
+    nlp = spacy.load(args.spacy_model)
+    rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+    if args.democrat_directory is not None:
+        benchmark_democrat(nlp, rules_analyzer, args.democrat_directory, runs=args.runs)
+    if args.input_file is None:
+        parser.exit()
+    text = read_text(args.input_file, args.repeat)
+    doc = nlp(text)
+    print('Document:', len(doc), 'tokens')
+
+    benchmark_lexicon(doc, rules_analyzer, runs=args.runs)
+    benchmark_morph(doc, rules_analyzer, runs=args.runs)
+    print(f'Rules: {time_initialize(nlp, text, rules_analyzer, runs=args.runs):.0f} tokens/sec')
+    benchmark_noun_pairs(doc, rules_analyzer, runs=args.runs)
+    benchmark_rule_stats(nlp, text, rules_analyzer, runs=args.runs)
+    benchmark_stage_orders(doc, rules_analyzer, runs=args.runs)
+    benchmark_rule_trace(nlp, text, rules_analyzer, runs=args.runs)
+    benchmark_batched_pairs(doc, rules_analyzer, runs=args.runs)
+    benchmark_candidate_windows(doc, rules_analyzer, runs=args.runs)
+    benchmark_ce_dernier(nlp, rules_analyzer, runs=args.runs)
@@ -24,45 +24,51 @@ def build_mention(
         detached_dep.extend(extra_detached_dep)
     start = heads[0].left_edge.i
     end = heads[-1].right_edge.i
+    # Tokens to trim are recorded as the roots of the subtrees and the
+    # (first, last) index ranges they belong to rather than as sets of tokens
+    excluded_subtree_roots = []
+    excluded_ranges = []
     siblings = rules_analyzer.get_dependent_siblings(heads[0])
-    unincluded_siblings_tokens = set()
     for sibling in siblings:
         if sibling not in heads:
-            unincluded_siblings_tokens.update(sibling.subtree)
-            unincluded_siblings_tokens.update(doc[sibling.i:end+1])
+            excluded_subtree_roots.append(sibling)
+            excluded_ranges.append((sibling.i, end))
     #be clauses are parsed differently
-    subj_attr_subtree = set()
     cops = [cop for cop in heads[0].children if cop.dep_ == "cop"]
     if cops:
         # We will trim all the tokens that are in the copula or subj attribute
         subjs = [s for s in heads[0].children if s.dep_ == "nsubj"]
-        cop_subtree = set(cops[0].subtree)
-        subj_subtree = set(subjs[0].subtree) if subjs else set()
-        subj_attr_subtree = cop_subtree | subj_subtree
+        excluded_subtree_roots.append(cops[0])
+        if subjs:
+            excluded_subtree_roots.append(subjs[0])
         if cops[0].i < heads[0].i:
-            subj_attr_subtree.update(doc[start:cops[0].i])
+            excluded_ranges.append((start, cops[0].i - 1))
         if cops[0].i > heads[-1].i:
-            subj_attr_subtree.update(doc[cops[0].i:end+1])
+            excluded_ranges.append((cops[0].i, end))
         if subjs and subjs[0].i < heads[0].i:
-            subj_attr_subtree.update(doc[start:subjs[0].i])
+            excluded_ranges.append((start, subjs[0].i - 1))
         if subjs and subjs[0].i > heads[-1].i:
-            subj_attr_subtree.update(doc[subjs[0].i:end+1])
+            excluded_ranges.append((subjs[0].i, end))
 
-    detached_tokens = set()
     for c in heads[0].children:
         if (c.dep_ in detached_dep or
         c.dep_ == "acl" and "VerbForm=Inf" in c.morph):
-            detached_tokens.update(c.subtree)
+            excluded_subtree_roots.append(c)
             if c.i < heads[0].i:
-                detached_tokens.update(doc[start:c.i])
+                excluded_ranges.append((start, c.i - 1))
             if c.i > heads[-1].i:
-                detached_tokens.update(doc[c.i:end+1])
+                excluded_ranges.append((c.i, end))
+
+    def is_excluded(token):
+        return any(first <= token.i <= last for first, last in excluded_ranges) or \
+            any(rules_analyzer.is_in_subtree(token, root) for root in excluded_subtree_roots)
+
     # Trims the mentions 
     # left
     for i in range(start, heads[0].i, 1):
         if (
             (doc[i].pos_ not in mention_pos_before and doc[i].lemma_ != "-")
-            or doc[i] in subj_attr_subtree|detached_tokens|unincluded_siblings_tokens):
+            or is_excluded(doc[i])):
             start = i + 1
         else:
             break
@@ -70,7 +76,7 @@ def build_mention(
     for j in range(end, heads[-1].i, -1):
         if (
             (doc[j].pos_ not in mention_pos_after )
-            or doc[j] in subj_attr_subtree|detached_tokens|unincluded_siblings_tokens):
+            or is_excluded(doc[j])):
             end = j - 1
         else:
             break
@@ -0,0 +1,166 @@
+# Copyright 2021 msg systems ag
+# Modifications Copyright 2021 Valentin-Gabriel Soumah
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import weakref
+from spacy.tokens import Doc, Token
+
+UNKNOWN, FALSE, TRUE = 0, 1, 2
+
+
+class TokenPredicateCache:
+    """Stores the boolean results of a token predicate in a byte per token.
+    Values are filled lazily the first time the predicate is asked for a token.
+    """
+
+    __slots__ = ("values", "hits", "misses")
+
+    def __init__(self, length: int):
+        self.values = bytearray(length)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: Token, predicate) -> bool:
+        value = self.values[token.i]
+        if value != UNKNOWN:
+            self.hits += 1
+            return value == TRUE
+        self.misses += 1
+        result = bool(predicate(token))
+        self.values[token.i] = TRUE if result else FALSE
+        return result
+
+
+class ProperName:
+    """The proper noun subtree of a token (see *get_propn_subtree()*) with the texts
+    that name matching compares: the words and the lowercased lemmas joined by spaces.
+    """
+
+    __slots__ = ("token_indexes", "text", "lemma")
+
+    def __init__(self, tokens: list):
+        self.token_indexes = tuple(token.i for token in tokens)
+        self.text = " ".join(token.text for token in tokens)
+        self.lemma = " ".join(token.lemma_.lower() for token in tokens)
+
+
+class ReferringFacts:
+    """The facts about a referring token that the checks of
+    *is_potential_anaphoric_pair()* read for every pair it is part of, see
+    *get_referring_facts()*.
+    """
+
+    __slots__ = (
+        "is_potential_anaphor", "refers_to_person", "is_possessive", "is_locative",
+        "is_third_person_pronoun", "is_celui_ci", "is_celui_la", "is_partitive_en",
+        "has_personal_subject_verb")
+
+    def __init__(self, **facts):
+        for name, value in facts.items():
+            setattr(self, name, value)
+
+
+class DocIndex:
+    """Facts about a doc that the rules need over and over again, computed at most once.
+    The analyzer keeps one index per doc and drops it when the doc is garbage collected,
+    which is why the index only holds a weak reference to its doc.
+    """
+
+    def __init__(self, doc: Doc):
+        self.doc_ref = weakref.ref(doc)
+        self.length = len(doc)
+        self.independent_nouns = TokenPredicateCache(self.length)
+        self.potential_anaphors = TokenPredicateCache(self.length)
+        self.reflexive_anaphors = TokenPredicateCache(self.length)
+        # (masc, fem, sing, plur) of every token, computed with directly=False and True
+        self.gender_number_infos = None
+        self.gender_number_matrix = None
+        # number of independent nouns before each token index (length + 1 values)
+        self.independent_noun_counts = None
+        # sorted indexes of the independent nouns of the doc
+        self.independent_noun_indexes = None
+        # TokenFeatureTable of the doc
+        self.token_features = None
+        # whether each token is part of a blacklisted phrase
+        self.blacklisted_tokens = None
+        # conjunctions, see RulesAnalyzer.get_conjunction_index()
+        self.conjunction_index = None
+        # head index and depth of every token, sentence index of every token
+        self.heads = None
+        self.depths = None
+        self.sentence_indexes = None
+        # index of the first token of every sentence, followed by the length of the doc
+        self.sentence_starts = None
+        # (left edges, right edges, sizes, projectivity) of the subtrees of the tokens
+        self.subtree_edges = None
+        # token index -> indexes of its ancestors, from its head upwards
+        self.ancestor_indexes = {}
+        # binary lifting table, see RulesAnalyzer.get_ancestor_table()
+        self.ancestor_table = None
+        # (part of speech ids, dependency ids) -> index of the closest matching ancestor
+        # of every token
+        self.nearest_matching_ancestors = {}
+        # token index -> facts about it used by the cataphora rule
+        self.referred_verb_ancestors = {}
+        self.cataphora_chains = {}
+        # token index -> ProperName, only for the tokens that head a proper name
+        self.proper_names = None
+        # character suffix of a proper name text (or lemma) -> indexes of the tokens heading
+        # the names ending with it
+        self.proper_name_text_suffixes = None
+        self.proper_name_lemma_suffixes = None
+        # core lemma -> indexes of the tokens with that core lemma, entity type -> indexes
+        # of the tokens in entities of that type
+        self.noun_core_lemma_buckets = None
+        self.entity_type_buckets = None
+        # referring token index -> indexes of the nouns it may corefer with
+        self.noun_pair_candidates = {}
+        # index of the first root or verb ancestor of every token (its own index if none)
+        # and whether it is a common noun within a naming appos chain, see
+        # RulesAnalyzer.is_potential_coreferring_pair_with_substantive()
+        self.clause_roots = None
+        self.appos_chain_members = None
+        # binding domains of the reflexive rules, see RulesAnalyzer.get_clause_labels()
+        self.clause_labels = None
+        # RuleStats of the decisions made on the doc, while they are recorded
+        self.rule_stats = None
+        # sorted indexes of the tokens an anaphor may refer to
+        self.referable_indexes = None
+        # sentence distance -> (referring indexes, window starts, window ends) of the
+        # potential anaphors and of the independent nouns, see
+        # RulesAnalyzer.get_anaphor_candidate_windows() and
+        # RulesAnalyzer.get_noun_candidate_windows()
+        self.anaphor_candidate_windows = {}
+        self.noun_candidate_windows = {}
+        # referring token index -> indexes of the candidate referreds left out by the
+        # candidate budget, and the CandidateBudgetStats of the doc
+        self.dropped_candidate_indexes = {}
+        self.candidate_budget_stats = None
+        # directly -> (keys, bucket of every token, token indexes of every bucket), see
+        # RulesAnalyzer.get_agreement_buckets()
+        self.agreement_buckets = {}
+        # referring token index -> ReferringFacts
+        self.referring_facts = {}
+        # referring token index -> (index of the last compatible noun, compatible noun indexes)
+        self.last_compatible_nouns = {}
+
+    def predicate_cache_info(self) -> dict:
+        return {
+            name: {"hits": cache.hits, "misses": cache.misses}
+            for name, cache in (
+                ("is_independent_noun", self.independent_nouns),
+                ("is_potential_anaphor", self.potential_anaphors),
+                ("is_reflexive_anaphor", self.reflexive_anaphors),
+            )
+        }
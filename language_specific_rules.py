@@ -13,11 +13,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from spacy.tokens import Token
+from spacy.tokens import Doc, Token
 from ...rules import RulesAnalyzer
 from ...data_model import Mention
+from .lexicon import FrenchLexicon, get_ids
+from .doc_index import DocIndex, ProperName, ReferringFacts
+from .token_features import MorphEncoder, TokenFeatureTable
+from .rule_diagnostics import RuleStats, RuleTrace, CandidateBudgetStats
 import sys
 import re
+from bisect import bisect_left
+from time import perf_counter
+import weakref
+import numpy as np
 
 
 class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
@@ -124,54 +132,537 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                         "maitre","maître","me", "ministre"
     }
 
+    # First names that are also frequent place names
+    toponym_first_names = ("Caroline", "Virginie", "Salvador", "Maurice", "Washington")
+
+    weather_words = (
+        "beau",
+        "mauvais",
+        "gris",
+        "chaud",
+        "froid",
+        "doux",
+        "frais",
+        "nuageux",
+        "orageux",
+        "frisquet",
+    )
+
     term_operator_pos = ("DET", "ADJ")
 
     term_operator_dep = ("det", "amod", "nmod", "nummod")
 
     clause_root_pos = ("VERB", "AUX")
 
+    # Demonstrative anaphors that may refer to a single member of a coordination
+    demonstrative_anaphor_lemmas = ("dernier", "celui", "celui-ci", "celui-là")
+
     disjointed_dep = ("dislocated","vocative","parataxis","discourse")
 
+    # Morphological features and values packed into one integer per token, see
+    # has_packed_morph()
+    morph_encoder = MorphEncoder({
+        "Gender": ("Masc", "Fem"),
+        "Number": ("Sing", "Plur"),
+        "Person": ("1", "2", "3"),
+        "PronType": ("Dem", "Prs", "Rel", "Int", "Ind"),
+        "Poss": ("Yes",),
+        "Reflex": ("Yes",),
+        "Definite": ("Def", "Ind"),
+        "NumType": ("Card", "Ord"),
+    })
+
+    # Clause head labels of tokens without a subject ancestor, see get_clause_labels()
+    NO_CLAUSE_HEAD, DISJOINTED_CLAUSE_HEAD = -1, -2
+
     french_word = re.compile("[\-\w][\-\w'&\.]*$")
 
-    def get_dependent_siblings(self, token: Token) -> list:
-        def add_siblings_recursively(recursed_token: Token, visited_set: set) -> None:
-            visited_set.add(recursed_token)
-            siblings_set = set()
-            if recursed_token.lemma_ in self.or_lemmas:
-                token._.coref_chains.temp_has_or_coordination = True
-            if recursed_token.dep_ in self.dependent_sibling_deps:
-                siblings_set.add(recursed_token)
-            for child in (
-                child
-                for child in recursed_token.children
-                if child not in visited_set
-                and (
-                    child.dep_ in self.dependent_sibling_deps
-                    or child.dep_ in self.conjunction_deps
-                )
-            ):
-                child_siblings_set = add_siblings_recursively(child, visited_set)
-                siblings_set |= child_siblings_set
-            return siblings_set
+    _lexicon = None
 
-        if (
-            token.dep_ not in self.conjunction_deps
-            and token.dep_ not in self.dependent_sibling_deps
-        ):
-            siblings_set = add_siblings_recursively(token, set())
+    @property
+    def lexicon(self) -> FrenchLexicon:
+        if self._lexicon is None:
+            self.compile_lexicon()
+        return self._lexicon
+
+    def compile_lexicon(self) -> FrenchLexicon:
+        """Compiles the word lists of the analyzer into a frozen *FrenchLexicon*.
+        Happens automatically the first time the rules need it and only has to be
+        called again after the word lists have been edited, in which case the facts
+        cached about the docs analyzed so far are dropped as they may depend on the
+        previous word lists.
+        """
+        if self._lexicon is not None:
+            self._doc_indexes = None
+            self._last_doc_index = None
+        self._lexicon = FrenchLexicon(self)
+        return self._lexicon
+
+    # Whether noun pairs are first looked up among the candidates of
+    # get_noun_pair_candidates() before the rules are run on them
+    use_noun_pair_candidate_buckets = False
+
+    # entity type -> extra nouns that can refer to entities of that type, see add_entity_nouns()
+    additional_entity_nouns = None
+
+    def add_entity_nouns(self, entity_type: str, nouns: list) -> None:
+        """Adds *nouns* to the nouns that can refer to named entities of *entity_type*,
+        e.g. *add_entity_nouns("ORG", ["constructeur"])* for 'Peugeot' -> 'le constructeur',
+        and recompiles the lexicon.
+        """
+        additional_entity_nouns = dict(self.additional_entity_nouns or {})
+        additional_entity_nouns[entity_type] = \
+            list(additional_entity_nouns.get(entity_type, ())) + list(nouns)
+        self.additional_entity_nouns = additional_entity_nouns
+        self.compile_lexicon()
+
+    def add_blacklisted_phrases(self, phrases: list) -> None:
+        """Adds *phrases* to the phrases whose nouns are not independent nouns,
+        e.g. domain specific phrases, and recompiles the lexicon.
+        """
+        self.blacklisted_phrases = list(self.blacklisted_phrases) + list(phrases)
+        self.compile_lexicon()
+
+    # Process-wide RuleStats of the decisions of the rules, None while they are not
+    # recorded, see enable_rule_stats()
+    rule_stats = None
+
+    def enable_rule_stats(self) -> RuleStats:
+        """Starts recording which branch of *is_potential_anaphor()*,
+        *is_potential_anaphoric_pair()* and *is_potential_coreferring_noun_pair()* decides
+        each call and how long the call takes. Returns the stats of the process; the stats
+        of each doc are returned by *get_doc_rule_stats()*.
+        """
+        if self.rule_stats is None:
+            self.rule_stats = RuleStats()
+        return self.rule_stats
+
+    def disable_rule_stats(self) -> None:
+        self.rule_stats = None
+
+    def get_doc_rule_stats(self, doc: Doc) -> RuleStats:
+        doc_index = self.get_doc_index(doc)
+        if doc_index.rule_stats is None:
+            doc_index.rule_stats = RuleStats()
+        return doc_index.rule_stats
+
+    # RuleTrace of a sample of the decisions of the rules, None while they are not traced,
+    # see enable_rule_trace()
+    rule_trace = None
+
+    def enable_rule_trace(
+        self, sampling_rate: float = 0.01, max_records: int = 10000, per_doc: bool = False,
+        max_records_per_doc: int = 1000, seed: int = None
+    ) -> RuleTrace:
+        """Starts tracing the decisions of *is_potential_anaphor()*,
+        *is_potential_anaphoric_pair()* and *is_potential_coreferring_noun_pair()* on a
+        sample of the calls (or of the docs with *per_doc=True*) and returns the trace.
+        Each record holds the rule, the branch that decided, the result, the tokens, whether
+        the pair is uncertain and, for anaphoric pairs, the stages run with their results.
+        """
+        self.rule_trace = RuleTrace(sampling_rate=sampling_rate, max_records=max_records,
+            per_doc=per_doc, max_records_per_doc=max_records_per_doc, seed=seed)
+        return self.rule_trace
+
+    def disable_rule_trace(self) -> None:
+        self.rule_trace = None
+
+    def record_rule_decision(self, rule: str, doc: Doc, decide, *args):
+        """Calls *decide(*args)*, which returns a result and the name of the branch that
+        decided it, records the decision for the process and for *doc* if the rule
+        statistics are enabled, traces it if it is sampled and returns the result.
+        """
+        rule_trace = self.rule_trace
+        if rule_trace is not None and rule_trace.is_sampled(doc):
+            return self.trace_rule_decision(rule, doc, decide, *args)
+        if self.rule_stats is None:
+            return decide(*args)[0]
+        start = perf_counter()
+        result, branch = decide(*args)
+        seconds = perf_counter() - start
+        self.rule_stats.record(rule, branch, not result, seconds)
+        self.get_doc_rule_stats(doc).record(rule, branch, not result, seconds)
+        return result
+
+    def trace_rule_decision(self, rule: str, doc: Doc, decide, *args):
+        start = perf_counter()
+        if decide == self.get_anaphoric_pair_decision:
+            result, branch, path = self.get_traced_anaphoric_pair_decision(*args)
         else:
-            siblings_set = set()
-        return sorted(siblings_set)
+            (result, branch), path = decide(*args), None
+        seconds = perf_counter() - start
+        if self.rule_stats is not None:
+            self.rule_stats.record(rule, branch, not result, seconds)
+            self.get_doc_rule_stats(doc).record(rule, branch, not result, seconds)
+        record = {"rule": rule, "branch": branch, "result": int(result),
+            "uncertain": rule == "is_potential_anaphoric_pair" and result == 1,
+            "tokens": [
+                {"i": list(arg.token_indexes), "text": " ".join(
+                    doc[index].text for index in arg.token_indexes)}
+                if isinstance(arg, Mention) else {"i": arg.i, "text": arg.text}
+                for arg in args if isinstance(arg, (Mention, Token))]}
+        if len(args) > 2:
+            record["directly"] = args[2]
+        if path is not None:
+            record["stages"] = path
+        self.rule_trace.add(record, perf_counter() - start - seconds)
+        return result
+
+    _doc_indexes = None
+
+    _last_doc_index = None
+
+    def get_doc_index(self, doc: Doc) -> DocIndex:
+        """Returns the *DocIndex* holding the cached facts about *doc*, creating it on
+        first use. The index is dropped when *doc* is garbage collected.
+        """
+        doc_index = self._last_doc_index
+        if doc_index is not None and doc_index.doc_ref() is doc and \
+                doc_index.length == len(doc):
+            return doc_index
+        if self._doc_indexes is None:
+            self._doc_indexes = weakref.WeakKeyDictionary()
+        doc_index = self._doc_indexes.get(doc)
+        if doc_index is None or doc_index.length != len(doc):
+            # missing or built before the doc was retokenized
+            doc_index = DocIndex(doc)
+            self._doc_indexes[doc] = doc_index
+        self._last_doc_index = doc_index
+        return doc_index
+
+    def get_heads(self, doc: Doc) -> np.ndarray:
+        """Returns the index of the head of every token of *doc*."""
+        doc_index = self.get_doc_index(doc)
+        if doc_index.heads is None:
+            doc_index.heads = np.array([token.head.i for token in doc], dtype=np.int32)
+        return doc_index.heads
+
+    def get_depths(self, doc: Doc) -> np.ndarray:
+        """Returns the depth of every token of *doc* within its sentence tree (0 for roots)."""
+        doc_index = self.get_doc_index(doc)
+        if doc_index.depths is None:
+            heads = self.get_heads(doc)
+            depths = np.full(len(doc), -1, dtype=np.int32)
+            for index in range(len(doc)):
+                chain = []
+                while depths[index] == -1:
+                    chain.append(index)
+                    if heads[index] == index:
+                        depths[index] = 0
+                        chain.pop()
+                        break
+                    index = heads[index]
+                for chain_index in reversed(chain):
+                    depths[chain_index] = depths[heads[chain_index]] + 1
+            doc_index.depths = depths
+        return doc_index.depths
+
+    def get_ancestor_indexes(self, token: Token) -> tuple:
+        """Returns the indexes of the ancestors of *token* from its head upwards,
+        i.e. *[ancestor.i for ancestor in token.ancestors]*.
+        """
+        doc_index = self.get_doc_index(token.doc)
+        ancestor_indexes = doc_index.ancestor_indexes.get(token.i)
+        if ancestor_indexes is None:
+            heads = self.get_heads(token.doc)
+            ancestor_list = []
+            index = token.i
+            while heads[index] != index:
+                index = int(heads[index])
+                ancestor_list.append(index)
+            ancestor_indexes = tuple(ancestor_list)
+            doc_index.ancestor_indexes[token.i] = ancestor_indexes
+        return ancestor_indexes
+
+    def get_ancestor_table(self, doc: Doc) -> np.ndarray:
+        """Returns the binary lifting table of *doc*: row *k* holds for every token the index
+        of its ancestor 2**k levels up, or of the root of its sentence if it is closer.
+        """
+        doc_index = self.get_doc_index(doc)
+        if doc_index.ancestor_table is None:
+            heads = self.get_heads(doc)
+            max_depth = int(self.get_depths(doc).max()) if len(doc) > 0 else 0
+            rows = [heads]
+            for _ in range(1, max(max_depth.bit_length(), 1)):
+                rows.append(rows[-1][rows[-1]])
+            doc_index.ancestor_table = np.array(rows, dtype=np.int32)
+        return doc_index.ancestor_table
+
+    def get_lifted_index(self, doc: Doc, index: int, levels: int) -> int:
+        """Returns the index of the ancestor *levels* levels above the token at *index*."""
+        ancestor_table = self.get_ancestor_table(doc)
+        row = 0
+        while levels > 0:
+            if levels & 1:
+                index = ancestor_table[row, index]
+            levels >>= 1
+            row += 1
+        return int(index)
+
+    def is_ancestor(self, ancestor: Token, token: Token) -> bool:
+        """Returns *True* if *ancestor* is one of the ancestors of *token*, i.e. is in
+        *token.ancestors*.
+        """
+        left_edges, right_edges, _, _ = self.get_subtree_edges(token.doc)
+        if not left_edges[ancestor.i] <= token.i <= right_edges[ancestor.i]:
+            return False
+        depths = self.get_depths(token.doc)
+        levels = int(depths[token.i] - depths[ancestor.i])
+        return levels > 0 and self.get_lifted_index(token.doc, token.i, levels) == ancestor.i
+
+    def get_lowest_common_ancestor(self, token: Token, other_token: Token) -> Token:
+        """Returns the lowest token that is *token* or one of its ancestors as well as
+        *other_token* or one of its ancestors, or *None* if the two tokens are in different
+        trees.
+        """
+        doc = token.doc
+        depths = self.get_depths(doc)
+        index, other_index = token.i, other_token.i
+        if depths[index] > depths[other_index]:
+            index = self.get_lifted_index(doc, index, int(depths[index] - depths[other_index]))
+        elif depths[other_index] > depths[index]:
+            other_index = self.get_lifted_index(
+                doc, other_index, int(depths[other_index] - depths[index]))
+        if index != other_index:
+            ancestor_table = self.get_ancestor_table(doc)
+            for row in range(len(ancestor_table) - 1, -1, -1):
+                if ancestor_table[row, index] != ancestor_table[row, other_index]:
+                    index = ancestor_table[row, index]
+                    other_index = ancestor_table[row, other_index]
+            index, other_index = ancestor_table[0, index], ancestor_table[0, other_index]
+            if index != other_index:
+                return None
+        return doc[int(index)]
+
+    def get_nearest_matching_ancestors(
+        self, doc: Doc, pos_ids: frozenset, dep_ids: frozenset = frozenset()
+    ) -> np.ndarray:
+        """Returns for every token of *doc* the index of its closest ancestor whose part of
+        speech is in *pos_ids* or whose dependency label is in *dep_ids*, or -1 if there is
+        none. Worked out once per doc for each pair of id sets.
+        """
+        doc_index = self.get_doc_index(doc)
+        key = (pos_ids, dep_ids)
+        nearest_ancestors = doc_index.nearest_matching_ancestors.get(key)
+        if nearest_ancestors is None:
+            heads = self.get_heads(doc).tolist()
+            matches = [token.pos in pos_ids or token.dep in dep_ids for token in doc]
+            nearest_ancestor_list = [-1] * len(doc)
+            # heads before children
+            for index in np.argsort(self.get_depths(doc), kind="stable").tolist():
+                head_index = heads[index]
+                if head_index != index:
+                    nearest_ancestor_list[index] = head_index if matches[head_index] \
+                        else nearest_ancestor_list[head_index]
+            nearest_ancestors = np.array(nearest_ancestor_list, dtype=np.int32)
+            doc_index.nearest_matching_ancestors[key] = nearest_ancestors
+        return nearest_ancestors
+
+    def get_nearest_ancestor_matching(
+        self, token: Token, pos_ids: frozenset, dep_ids: frozenset = frozenset()
+    ) -> Token:
+        """Returns the first token in *token.ancestors* whose part of speech is in *pos_ids*
+        or whose dependency label is in *dep_ids*, or *None* if there is none.
+        """
+        index = self.get_nearest_matching_ancestors(token.doc, pos_ids, dep_ids)[token.i]
+        return token.doc[int(index)] if index >= 0 else None
+
+    def get_subtree_edges(self, doc: Doc) -> tuple:
+        """Returns four arrays holding for each token of *doc*:
+
+        - the index of the first token of its subtree;
+        - the index of the last token of its subtree;
+        - the number of tokens in its subtree, the subtree being contiguous, i.e. the span
+          between its edges, if it is the length of that span;
+        - whether the subtrees of the token and of all its descendants are contiguous, in
+          which case *token.subtree* yields the tokens of the span in the order of the doc.
+        """
+        doc_index = self.get_doc_index(doc)
+        if doc_index.subtree_edges is None:
+            heads = self.get_heads(doc).tolist()
+            length = len(doc)
+            left_edges = list(range(length))
+            right_edges = list(range(length))
+            sizes = [1] * length
+            # children before heads
+            bottom_up_indexes = np.argsort(-self.get_depths(doc), kind="stable").tolist()
+            for index in bottom_up_indexes:
+                head_index = heads[index]
+                if head_index == index:
+                    continue
+                sizes[head_index] += sizes[index]
+                if left_edges[index] < left_edges[head_index]:
+                    left_edges[head_index] = left_edges[index]
+                if right_edges[index] > right_edges[head_index]:
+                    right_edges[head_index] = right_edges[index]
+            left_edges = np.array(left_edges, dtype=np.int32)
+            right_edges = np.array(right_edges, dtype=np.int32)
+            sizes = np.array(sizes, dtype=np.int32)
+            is_projective = (sizes == right_edges - left_edges + 1).tolist()
+            for index in bottom_up_indexes:
+                if not is_projective[index] and heads[index] != index:
+                    is_projective[heads[index]] = False
+            doc_index.subtree_edges = (
+                left_edges, right_edges, sizes, np.array(is_projective, dtype=bool))
+        return doc_index.subtree_edges
+
+    def is_in_subtree(self, token: Token, subtree_root: Token) -> bool:
+        """Returns *True* if *token* is in the subtree of *subtree_root*, i.e. is
+        *subtree_root* or one of its descendants, with an interval check when the subtree
+        is contiguous.
+        """
+        left_edges, right_edges, sizes, _ = self.get_subtree_edges(token.doc)
+        root_index = subtree_root.i
+        if not left_edges[root_index] <= token.i <= right_edges[root_index]:
+            return False
+        if sizes[root_index] == right_edges[root_index] - left_edges[root_index] + 1:
+            return True
+        return token.i == root_index or self.is_ancestor(subtree_root, token)
+
+    def get_subtree(self, token: Token) -> list:
+        """Returns the same list as *list(token.subtree)*, sliced from the doc when the
+        subtree is projective.
+        """
+        left_edges, right_edges, _, is_projective = self.get_subtree_edges(token.doc)
+        if is_projective[token.i]:
+            return list(token.doc[left_edges[token.i]:right_edges[token.i] + 1])
+        return list(token.subtree)
+
+    def get_sentence_starts(self, doc: Doc) -> np.ndarray:
+        """Returns the index of the first token of every sentence of *doc*, followed by
+        *len(doc)*, so that the tokens of sentence *i* are those from *starts[i]* to
+        *starts[i + 1]*.
+        """
+        doc_index = self.get_doc_index(doc)
+        if doc_index.sentence_starts is None:
+            sentence_starts = [sentence.start for sentence in doc.sents]
+            sentence_starts.append(len(doc))
+            doc_index.sentence_starts = np.array(sentence_starts, dtype=np.int32)
+        return doc_index.sentence_starts
+
+    def get_sentence_indexes(self, doc: Doc) -> np.ndarray:
+        """Returns the index of the sentence of every token of *doc*."""
+        doc_index = self.get_doc_index(doc)
+        if doc_index.sentence_indexes is None:
+            sentence_starts = self.get_sentence_starts(doc)
+            doc_index.sentence_indexes = np.repeat(
+                np.arange(len(sentence_starts) - 1, dtype=np.int32), np.diff(sentence_starts))
+        return doc_index.sentence_indexes
+
+    def get_sentence_windows(
+        self, doc: Doc, indexes: np.ndarray, referring_indexes: np.ndarray,
+        sentence_distance: int
+    ) -> tuple:
+        """Returns the windows of the tokens at *referring_indexes* within the sorted token
+        *indexes*, as two arrays of positions in *indexes*: the tokens of the window of
+        *referring_indexes[i]* are *indexes[starts[i]:ends[i]]*, from *sentence_distance*
+        sentences before its sentence up to the end of its sentence.
+        """
+        sentence_starts = self.get_sentence_starts(doc)
+        sentence_indexes = self.get_sentence_indexes(doc)[referring_indexes]
+        window_starts = sentence_starts[np.maximum(sentence_indexes - sentence_distance, 0)]
+        window_ends = sentence_starts[sentence_indexes + 1]
+        return (np.searchsorted(indexes, window_starts).astype(np.int32),
+            np.searchsorted(indexes, window_ends).astype(np.int32))
+
+    def get_token_features(self, doc: Doc) -> TokenFeatureTable:
+        """Returns the *TokenFeatureTable* of *doc*, filling it on first use."""
+        doc_index = self.get_doc_index(doc)
+        if doc_index.token_features is None:
+            doc_index.token_features = TokenFeatureTable(
+                doc, self.french_word, self.morph_encoder)
+        return doc_index.token_features
+
+    def has_packed_morph(self, token: Token, tag: str, value: str = None) -> bool:
+        """Same as *has_morph()*, but reads the packed morphology of *token* when *tag* and
+        *value* are encoded by *morph_encoder*.
+        """
+        bit = self.morph_encoder.get_bit(tag, value)
+        if bit is None:
+            return self.has_morph(token, tag, value)
+        return self.get_token_features(token.doc).morph_masks[token.i] & bit != 0
+
+    def get_conjunction_index(self, doc: Doc) -> tuple:
+        """Returns the conjunctions of *doc*, found in one pass over the tokens, as a tuple of:
+
+        - the governors: for each token linked to its head by a conjunction ('conj', 'cc',
+          'punct' ...), the index of the closest ancestor that is not, or -1 if there is
+          none; the index of the token itself otherwise;
+        - the sorted 'conj' members of the conjunctions each governor heads, stored as the
+          slice *sibling_starts[i]:sibling_starts[i+1]* of *sibling_indexes* for governor *i*;
+        - for each governor, whether its conjunction contains an or-lemma ('ou', 'soit').
+        """
+        doc_index = self.get_doc_index(doc)
+        if doc_index.conjunction_index is not None:
+            return doc_index.conjunction_index
+        lexicon = self.lexicon
+        linked_dep_ids = lexicon.dependent_sibling_dep_ids | lexicon.conjunction_dep_ids
+        length = len(doc)
+        # union-find over the conjunction edges, the representative of a set being its root
+        parents = [
+            token.head.i if token.dep in linked_dep_ids else token.i for token in doc]
+
+        def find(index: int) -> int:
+            root = index
+            while parents[root] != root:
+                root = parents[root]
+            while parents[index] != root:
+                parents[index], index = root, parents[index]
+            return root
+
+        governors = [-1] * length
+        siblings = [[] for _ in range(length)]
+        has_or = np.zeros(length, dtype=bool)
+        for token in doc:
+            root = find(token.i)
+            if doc[root].dep in linked_dep_ids:
+                # a conjunction that is the root of its sentence has no governor
+                continue
+            governors[token.i] = root
+            if token.dep in lexicon.dependent_sibling_dep_ids:
+                siblings[root].append(token.i)
+            if token.lemma_ in self.or_lemmas:
+                has_or[root] = True
+        sibling_starts = np.zeros(length + 1, dtype=np.int32)
+        np.cumsum([len(token_siblings) for token_siblings in siblings], out=sibling_starts[1:])
+        sibling_indexes = np.array(
+            [index for token_siblings in siblings for index in token_siblings], dtype=np.int32)
+        doc_index.conjunction_index = (
+            np.array(governors, dtype=np.int32), sibling_starts, sibling_indexes, has_or)
+        return doc_index.conjunction_index
+
+    def get_dependent_siblings(self, token: Token) -> list:
+        if token.dep in self.lexicon.dependent_sibling_dep_ids or \
+                token.dep in self.lexicon.conjunction_dep_ids:
+            return []
+        doc = token.doc
+        governors, sibling_starts, sibling_indexes, has_or = self.get_conjunction_index(doc)
+        if has_or[token.i]:
+            token._.coref_chains.temp_has_or_coordination = True
+        return [doc[int(index)] for index in
+            sibling_indexes[sibling_starts[token.i]:sibling_starts[token.i + 1]]]
+
+    def is_involved_in_non_or_conjunction(self, token: Token) -> bool:
+        governors, sibling_starts, sibling_indexes, has_or = \
+            self.get_conjunction_index(token.doc)
+        if sibling_starts[token.i + 1] > sibling_starts[token.i]:
+            return not has_or[token.i]
+        if token.dep in self.lexicon.dependent_sibling_dep_ids and governors[token.i] != -1:
+            return not has_or[governors[token.i]]
+        return False
 
     def is_independent_noun(self, token: Token) -> bool:
-        if not self.french_word.match(token.text) : return False
-        if token.pos_ == "PROPN" and \
-            re.match("[^A-ZÂÊÎÔÛÄËÏÖÜÀÆÇÉÈŒÙ]",token.lemma_):
+        return self.get_doc_index(token.doc).independent_nouns.get(
+            token, self._is_independent_noun)
+
+    def _is_independent_noun(self, token: Token) -> bool:
+        token_features = self.get_token_features(token.doc)
+        if not token_features.is_french_word[token.i] : return False
+        if token_features.is_lowercase_propn[token.i]:
             return False
         if (
             token.lemma_ in {"un", "certains", "certain"}
-            or self.has_morph(token, "NumType", "Card")
+            or self.has_packed_morph(token, "NumType", "Card")
         ) and (
             any(
                 child
@@ -189,7 +680,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         elif self.is_quelqun_head(token):
             pass
         elif (
-            token.pos_ not in self.noun_pos + ("ADJ", "PRON")
+            token.pos not in self.lexicon.noun_adj_pron_pos_ids
             or token.dep_ in ("fixed", "flat:name", "flat:foreign", "amod")
             or (token.pos_ in ("ADJ", "PRON") and not self.has_det(token))
         ):
@@ -197,7 +688,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         elif  (
             token.lemma_ == "dernier"
             and any(
-                self.has_morph(child, "PronType", "Dem") for child in token.children
+                self.has_packed_morph(child, "PronType", "Dem") for child in token.children
             )
             and token.dep_ not in ("amod", "appos")
         ):
@@ -205,70 +696,93 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         if (
             token.i>0 and token.ent_type_ != "" and
             token.doc[token.i-1].ent_type_ == token.ent_type_
-            and token.doc[token.i-1] not in token.subtree
+            and not self.is_in_subtree(token.doc[token.i-1], token)
         ):
             return False
         
-        if not self.has_det(token) and token.lemma_ in self.blacklisted_nouns:
+        if not self.has_det(token) and token.lemma_ in self.lexicon.blacklisted_nouns:
             return False
-        return not self.is_token_in_one_of_phrases(token, self.blacklisted_phrases)
+        return not self.is_in_blacklisted_phrase(token)
+
+    def is_in_blacklisted_phrase(self, token: Token) -> bool:
+        """Returns *True* if *token* is part of one of the blacklisted phrases. The phrases
+        are looked for once per doc.
+        """
+        doc_index = self.get_doc_index(token.doc)
+        if doc_index.blacklisted_tokens is None:
+            doc_index.blacklisted_tokens = np.array(
+                self.lexicon.blacklisted_phrase_trie.match(token.doc), dtype=bool)
+        return bool(doc_index.blacklisted_tokens[token.i])
 
     def is_potential_anaphor(self, token: Token) -> bool:
-        if not self.french_word.match(token.text) : return False
+        return self.get_doc_index(token.doc).potential_anaphors.get(
+            token, self._is_potential_anaphor)
+
+    def _is_potential_anaphor(self, token: Token) -> bool:
+        if self.rule_stats is None and self.rule_trace is None:
+            return self.get_anaphor_decision(token)[0]
+        return self.record_rule_decision(
+            "is_potential_anaphor", token.doc, self.get_anaphor_decision, token)
+
+    def get_anaphor_decision(self, token: Token) -> tuple:
+        """Returns whether *token* is a potential anaphor along with the name of the rule
+        branch that decided it, see *RuleStats*.
+        """
+        if not self.get_token_features(token.doc).is_french_word[token.i] : return False, "not_french_word"
         # Ce dernier, cette dernière...
         if (
             token.lemma_ == "dernier"
             and any(
-                self.has_morph(child, "PronType", "Dem") for child in token.children
+                self.has_packed_morph(child, "PronType", "Dem") for child in token.children
             )
             and token.dep_ not in ("amod", "appos")
         ):
-            return True
+            return True, "ce_dernier"
         if self.is_emphatic_reflexive_anaphor(token):
-            return True
+            return True, "emphatic_reflexive"
         if token.lemma_ in {"celui", "celle"}:
-            return True
+            return True, "celui"
         if token.lower_  in {"-elle"}:
-            return True
+            return True, "inverted_elle"
         if (token.lower_ == "-il" and 
             token.i > 0 and 
             token.doc[token.i-1].lemma_ != "avoir" and
             token.dep_ != "expl:subj"
         ):
-            return True
+            return True, "inverted_il"
         if not (
             (
                 token.pos_ == "PRON"
                 and (
-                    self.has_morph(token, "Person", "3")
-                    or self.has_morph(token, "PronType", "Dem")
+                    self.has_packed_morph(token, "Person", "3")
+                    or self.has_packed_morph(token, "PronType", "Dem")
                 )
             )
             or (token.pos_ == "ADV" and token.lemma_ in {"ici", "là"})
-            or (token.pos_ == "DET" and self.has_morph(token, "Poss", "Yes"))
+            or (token.pos_ == "DET" and self.has_packed_morph(token, "Poss", "Yes"))
         ):
-            return False
+            return False, "not_pronoun"
         if (
             token.pos_ == "DET"
-            and self.has_morph(token, "Poss", "Yes")
+            and self.has_packed_morph(token, "Poss", "Yes")
             and token.lemma_ in {"mon", "ton", "notre", "votre"}
         ):
-            return False
+            return False, "first_second_person_possessive"
         # When anaphoric , the demonstrative refers almost always to a whole proposition and not a noun phrase
         if token.lemma_ in {"ce", "ça", "cela", "-ce"}:
-            return False
+            return False, "proposition_demonstrative"
 
         if token.lemma_ == "on":
-            return False
+            return False, "on"
         # Il y a...
         if token.text == "y" and token.dep_ == "fixed":
-            return False
+            return False, "il_y_a"
         if any(
             child
             for child in token.children
             if child.dep_ == "fixed" and child.lemma_ == "y"
         ):
-            return False
+            return False, "il_y_a"
 
         try:
             if (
@@ -277,48 +791,38 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                 or (token.nbor(1).lemma_ == "-" and token.nbor(2).lemma_ == "bas")
             ):
                 # Typically deictic
-                return False
+                return False, "la_bas"
         except IndexError:
             pass
         if token.lemma_ in ("-", "ci", "-ci", "-là"):
-            return False
+            return False, "particle"
         # Avalent Il. In case some are not marked as expletive
         inclusive_head_children = [token.head] + list(token.head.children)
+        avalent_verbs = self.lexicon.avalent_verbs
         if (
-            token.dep_ != self.root_dep
-            and token.head.pos_ in ("AUX", "VERB")
+            token.dep != self.lexicon.root_dep_id
+            and token.head.pos in self.lexicon.clause_root_pos_ids
             and any(
                 [
                     1
                     for child in inclusive_head_children
-                    if child.lemma_ in self.avalent_verbs
+                    if child.lemma_ in avalent_verbs
                 ]
             )
             ):
-            return False
+            return False, "avalent_verb"
 
         # impersonal constructions
         if (
             token.dep_ in {"expl:comp", "expl:pass", "expl:subj"}
             and token.lemma_ not in {"en"}
-            and not self.has_morph(token, "Reflex", "Yes")
+            and not self.has_packed_morph(token, "Reflex", "Yes")
         ):
-            return False
+            return False, "impersonal"
 
         # Il fait froid/chaud/soleil/beau
         if token.head.text.lower() == "fait" or token.head.lemma_ == "faire":
-            weather_words = {
-                "beau",
-                "mauvais",
-                "gris",
-                "chaud",
-                "froid",
-                "doux",
-                "frais",
-                "nuageux",
-                "orageux",
-                "frisquet",
-            }
+            weather_words = self.lexicon.weather_words
             objects = [
                 child
                 for child in token.head.children
@@ -327,12 +831,12 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             ]
             for obj in objects:
                 if obj.lemma_ in weather_words:
-                    return False
+                    return False, "weather"
 
-        if self.has_morph(token, "NumType", "Card"):
-            return False
+        if self.has_packed_morph(token, "NumType", "Card"):
+            return False, "cardinal"
 
-        return True
+        return True, "potential_anaphor"
 
     def is_emphatic_reflexive_anaphor(self, token: Token) -> bool:
         if token.lemma_ in {"lui-même", "elle-même", "soi-même"}:
@@ -340,7 +844,8 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         try:
             if (
                 token.nbor(1).lemma_ == "-" and token.nbor(2).lemma_ == "même"
-            ) and token.lemma_.lower() in {"lui", "elle", "elles", "eux", "soi"}:
+            ) and self.get_token_features(token.doc).lower_lemmas[token.i] in \
+                    {"lui", "elle", "elles", "eux", "soi"}:
                 return True
         except IndexError:
             pass
@@ -357,13 +862,42 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         return False
     
     def has_det(self, token: Token) ->bool:
-        return any(det for det in token.children if det.dep_ == "det")
+        return bool(self.get_token_features(token.doc).has_det[token.i])
+
+    def get_gender_number_info(self, token : Token, directly = False, det_infos = False) -> tuple:
+        if det_infos:
+            return self._get_gender_number_info(token, directly=directly, det_infos=True)
+        return self.get_gender_number_infos(token.doc)[1 if directly else 0][token.i]
+
+    def get_gender_number_infos(self, doc: Doc) -> tuple:
+        """Returns two lists with the (masc, fem, sing, plur) info of every token of *doc*,
+        the first one computed with *directly=False* and the second one with *directly=True*.
+        Both lists are computed in one pass and cached along with their array form,
+        see *get_gender_number_matrix()*.
+        """
+        doc_index = self.get_doc_index(doc)
+        if doc_index.gender_number_infos is None:
+            infos, direct_infos = [], []
+            for token in doc:
+                infos.append(self._get_gender_number_info(token, directly=False))
+                direct_infos.append(self._get_gender_number_info(token, directly=True))
+            doc_index.gender_number_infos = (infos, direct_infos)
+            doc_index.gender_number_matrix = np.array(
+                (infos, direct_infos), dtype=bool).reshape((2, len(doc), 4))
+        return doc_index.gender_number_infos
+
+    def get_gender_number_matrix(self, doc: Doc) -> np.ndarray:
+        """Returns a boolean array of shape (2, len(doc), 4) with the masc, fem, sing and plur
+        columns of every token, [0] computed with *directly=False* and [1] with *directly=True*.
+        """
+        self.get_gender_number_infos(doc)
+        return self.get_doc_index(doc).gender_number_matrix
 
-    def get_gender_number_info(self, token : Token, directly = False, det_infos = False) -> bool:
+    def _get_gender_number_info(self, token : Token, directly = False, det_infos = False) -> tuple:
         masc = fem = sing = plur = False
         if self.is_quelqun_head(token):
             sing = masc = fem = True
-        elif self.has_morph(token, "Poss", "Yes") and not det_infos:
+        elif self.has_packed_morph(token, "Poss", "Yes") and not det_infos:
             if self.is_potential_anaphor(token):
                 # the plural morphs of poss determiner don't mark the owner but the owned
                 if token.lemma_ == "leur":
@@ -372,13 +906,13 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                     sing = True
                 masc = fem = True
         else:
-            if self.has_morph(token, "Number", "Sing"):
+            if self.has_packed_morph(token, "Number", "Sing"):
                 sing = True
-            if self.has_morph(token, "Number", "Plur"):
+            if self.has_packed_morph(token, "Number", "Plur"):
                 plur = True
-            if self.has_morph(token, "Gender", "Masc"):
+            if self.has_packed_morph(token, "Gender", "Masc"):
                 masc = True
-            if self.has_morph(token, "Gender", "Fem"):
+            if self.has_packed_morph(token, "Gender", "Fem"):
                 fem = True
 
             if token.lemma_ in {"ici", "là", "y", "en"}:
@@ -401,20 +935,20 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                 elif token.lower_.startswith("soi"):
                     masc = fem = sing = plur = True
 
-                if self.has_morph(token, "Reflex", "Yes"):
+                if self.has_packed_morph(token, "Reflex", "Yes"):
                     #se
-                    if token.head.pos_ in self.clause_root_pos:
-                        sing = self.has_morph(token.head, "Number", "Sing")
-                        plur = self.has_morph(token.head, "Number", "Plur")
+                    if token.head.pos in self.lexicon.clause_root_pos_ids:
+                        sing = self.has_packed_morph(token.head, "Number", "Sing")
+                        plur = self.has_packed_morph(token.head, "Number", "Plur")
                     masc = fem = True
 
             elif token.pos_ == "PROPN":
-
-                if token.lemma_ in self.male_names:
+                lexicon = self.lexicon
+                if token.lemma_ in lexicon.male_names:
                     masc = True
-                if token.lemma_ in self.female_names:
+                if token.lemma_ in lexicon.female_names:
                     fem = True
-                if token.lemma_ not in self.male_names + self.female_names:
+                if token.lemma_ not in lexicon.first_names:
                     masc = fem = True
                 if not plur:
                     # proper nouns without plur mark are typically singular
@@ -426,7 +960,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             # Je les vois
             masc = fem = True
         # get grammatical info from det
-        if token.pos_ in self.noun_pos + ('ADJ',) and not det_infos:
+        if token.pos in self.lexicon.noun_adj_pos_ids and not det_infos:
             for det in token.children:
                 # prevent recurs for single det phrase
                 if det == token : break
@@ -454,25 +988,19 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         return masc, fem, sing, plur
 
     def refers_to_person(self, token) -> bool:
-        
+        lexicon = self.lexicon
         if (
             token.ent_type_ == "PER"
             or self.is_quelqun_head(token)
-            or token.lemma_.lower()
-            in self.entity_noun_dictionary["PER"] + self.person_roles
+            or self.get_token_features(token.doc).lower_lemmas[token.i] in lexicon.person_nouns
         ):
             return True
         if (
-            token.pos_ == self.propn_pos
-            and token.lemma_ in self.male_names + self.female_names
+            token.pos in lexicon.propn_pos_ids
+            and token.lemma_ in lexicon.first_names
             and (
                 token.ent_type_ not in ["LOC","ORG"] or
-                token.lemma_ in [
-                    "Caroline",
-                    "Virginie",
-                    "Salvador",
-                    "Maurice",
-                    "Washington"]
+                token.lemma_ in lexicon.toponym_first_names
                 )
             ):
             return True
@@ -481,37 +1009,23 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             token.dep_ in ("nsubj", "nsubj:pass")
         ):
             verb_lemma = token.head.lemma_
-            if verb_lemma[-1] == "e" and verb_lemma[-2]!="r":
+            if verb_lemma.endswith("e") and not verb_lemma.endswith("re"):
             # first group verbs that are not lemmatised correctly
                 verb_lemma = verb_lemma + "r"
-            if verb_lemma in self.verbs_with_personal_subject:
+            if verb_lemma in lexicon.verbs_with_personal_subject:
                 return True
         return False    
-    def is_potential_anaphoric_pair(
-        self, referred: Mention, referring: Token, directly: bool
-    ) -> bool:
-
+    def get_referred_gender_number_info(
+        self, referred: Mention, referring: Token, referring_info: tuple, directly: bool
+    ) -> tuple:
+        """Merges the gender and number info of the tokens of *referred* and returns it
+        if it agrees with *referring_info*, the info of *referring*. Returns *None* when
+        they don't agree, including the cases of coordination and of the
+        "le masculin l'emporte" rule.
+        """
         doc = referring.doc
         referred_root = doc[referred.root_index]
-        uncertain = False
-
-        if self.is_quelqun_head(referred_root) and referred.root_index > referring.i:
-            # qqn can't be cataphoric
-            return 0
-        if (
-            self.has_morph(referring, "Pos", "Yes")
-            and referring.head == referred_root
-            and referred_root.lemma_ != "personne"
-        ):
-            # possessive can't be determiner of its own reference
-            # * mon moi-même.
-            return 0
-        (
-            referring_masc,
-            referring_fem,
-            referring_sing,
-            referring_plur,
-        ) = self.get_gender_number_info(referring, directly=directly)
+        referring_masc, referring_fem, referring_sing, referring_plur = referring_info
         # e.g. 'les hommes et les femmes' ... 'ils': 'ils' cannot refer only to
         # 'les hommes' or 'les femmes'
         if (
@@ -525,9 +1039,9 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                 and referring.i
                 < referred_root._.coref_chains.temp_dependent_siblings[-1].i
             )
-            and referring.lemma_ not in ("dernier", "celui", "celui-ci", "celui-là")
+            and referring.lemma_ not in self.demonstrative_anaphor_lemmas
         ):
-            return 0
+            return None
 
         referred_masc = referred_fem = referred_sing = referred_plur = False
 
@@ -538,15 +1052,16 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             referred_plur = True
             referred_sing = False
             if not referring_plur:
-                return 0
+                return None
 
-        for working_token in (doc[index] for index in referred.token_indexes):
+        gender_number_infos = self.get_gender_number_infos(doc)[1 if directly else 0]
+        for index in referred.token_indexes:
             (
                 working_masc,
                 working_fem,
                 working_sing,
                 working_plur,
-            ) = self.get_gender_number_info(working_token, directly=directly)
+            ) = gender_number_infos[index]
             referred_masc = referred_masc or working_masc
             referred_fem = referred_fem or working_fem
             referred_sing = referred_sing or working_sing
@@ -560,23 +1075,703 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             ):
                 # "Le Masculin l'emporte" rule :
                 # If there is any masc in the dependent referred, the referring has to be masc only
-                return 0
+                return None
 
         if not ((referred_masc and referring_masc) or (referred_fem and referring_fem)):
-            return 0
+            return None
 
         if not (
             (referred_plur and referring_plur) or (referred_sing and referring_sing)
         ):
+            return None
+        return referred_masc, referred_fem, referred_sing, referred_plur
+
+    def get_anaphoric_agreement_mask(
+        self, referring: Token, referreds: list, directly: bool
+    ) -> np.ndarray:
+        """Returns a boolean array telling for each mention of *referreds* whether it agrees
+        in gender and number with *referring*, i.e. whether
+        *get_referred_gender_number_info()* would return anything for it.
+        Single token mentions are checked in bulk on the gender/number matrix.
+        """
+        doc = referring.doc
+        gender_number_infos = self.get_gender_number_infos(doc)[1 if directly else 0]
+        matrix = self.get_gender_number_matrix(doc)[1 if directly else 0]
+        referring_info = gender_number_infos[referring.i]
+        referring_masc, referring_fem, referring_sing, referring_plur = referring_info
+        mask = np.zeros(len(referreds), dtype=bool)
+        single_positions = []
+        single_root_indexes = []
+        for position, referred in enumerate(referreds):
+            if len(referred.token_indexes) == 1:
+                single_positions.append(position)
+                single_root_indexes.append(referred.root_index)
+            else:
+                mask[position] = self.get_referred_gender_number_info(
+                    referred, referring, referring_info, directly) is not None
+        if len(single_positions) == 0:
+            return mask
+        masc, fem, sing, plur = matrix[single_root_indexes].T
+        agreeing = ((masc & referring_masc) | (fem & referring_fem)) & \
+            ((sing & referring_sing) | (plur & referring_plur))
+        if referring_fem and not referring_masc:
+            # "Le Masculin l'emporte"
+            agreeing &= ~(masc & ~fem)
+        if referring_plur and not referring_sing and \
+                referring.lemma_ not in self.demonstrative_anaphor_lemmas:
+            # a plural anaphor can't refer to a single member of a coordination
+            for position in np.flatnonzero(agreeing):
+                agreeing[position] = self.get_referred_gender_number_info(
+                    referreds[single_positions[position]], referring, referring_info,
+                    directly) is not None
+        mask[single_positions] = agreeing
+        return mask
+
+    def get_independent_noun_counts(self, doc: Doc) -> np.ndarray:
+        """Returns the prefix counts of the independent nouns of *doc*: the value at index
+        *i* is the number of independent nouns among the tokens before *i*.
+        """
+        doc_index = self.get_doc_index(doc)
+        if doc_index.independent_noun_counts is None:
+            counts = np.zeros(len(doc) + 1, dtype=np.int32)
+            np.cumsum([self.is_independent_noun(token) for token in doc], out=counts[1:])
+            doc_index.independent_noun_counts = counts
+        return doc_index.independent_noun_counts
+
+    def get_independent_noun_indexes(self, doc: Doc) -> list:
+        """Returns the sorted indexes of the independent nouns of *doc*."""
+        doc_index = self.get_doc_index(doc)
+        if doc_index.independent_noun_indexes is None:
+            doc_index.independent_noun_indexes = \
+                np.flatnonzero(np.diff(self.get_independent_noun_counts(doc))).tolist()
+        return doc_index.independent_noun_indexes
+
+    def count_independent_nouns(self, doc: Doc, start: int, end: int) -> int:
+        """Returns the number of independent nouns among doc[start:end]."""
+        counts = self.get_independent_noun_counts(doc)
+        return int(counts[end] - counts[start]) if end > start else 0
+
+    def get_noun_phrase_ordinal(self, token: Token) -> int:
+        """Returns the number of independent nouns preceding *token* in its doc, so that
+        the number of noun phrases between two tokens is the difference of their ordinals.
+        """
+        return int(self.get_independent_noun_counts(token.doc)[token.i])
+
+    def get_last_compatible_noun(self, referring: Token) -> tuple:
+        """Returns the index of the last independent noun before *referring* that is
+        grammatically compatible with it, skipping the nouns that modify other nouns
+        ('nmod', 'appos'), or -1 if there is none. It comes with the indexes of the
+        compatible nouns from that noun up to *referring*, which are the ones
+        'celui-ci' or 'ce dernier' can refer to:
+        "Le président du pays... ce dernier" can refer to both nouns.
+        The result is worked out once per referring token.
+        """
+        doc_index = self.get_doc_index(referring.doc)
+        last_compatible_noun = doc_index.last_compatible_nouns.get(referring.i)
+        if last_compatible_noun is not None:
+            return last_compatible_noun
+        doc = referring.doc
+        noun_indexes = self.get_independent_noun_indexes(doc)
+        last_noun_index = -1
+        compatible_noun_indexes = set()
+        for position in range(bisect_left(noun_indexes, referring.i) - 1, -1, -1):
+            previous_token_index = noun_indexes[position]
+            if previous_token_index == 0:
+                break
+            previous_token = doc[previous_token_index]
+            if not self.is_potential_anaphoric_pair(
+                Mention(previous_token), referring, directly=False
+            ):
+                continue
+            compatible_noun_indexes.add(previous_token_index)
+            if previous_token.dep_ not in ("nmod", "appos"):
+                last_noun_index = previous_token_index
+                break
+        last_compatible_noun = (last_noun_index, frozenset(compatible_noun_indexes))
+        doc_index.last_compatible_nouns[referring.i] = last_compatible_noun
+        return last_compatible_noun
+
+    # Maximum number of candidate referreds of an anaphor that go through the rules of
+    # is_potential_anaphoric_pair(), see set_anaphor_candidate_budget(); None for no limit
+    anaphor_candidate_budget = None
+
+    # Process-wide CandidateBudgetStats while there is a candidate budget
+    candidate_budget_stats = None
+
+    def set_anaphor_candidate_budget(self, budget: int) -> CandidateBudgetStats:
+        """Limits the candidate referreds of each anaphor that go through the rules to the
+        *budget* candidates with the best scores from *score_anaphor_candidates()*, the
+        other candidates being rejected straight away, or removes the limit if *budget* is
+        *None*. This caps the time spent on each anaphor in long enumerations at the risk
+        of missing a referred. Returns the stats of the process, which tell how often the
+        budget was hit; the stats of each doc are returned by
+        *get_doc_candidate_budget_stats()*. The candidates left out of the docs analyzed
+        under the previous budget are dropped along with the stats of these docs.
+        """
+        if budget is not None and budget < 1:
+            raise ValueError(" ".join(("budget must be at least 1:", str(budget))))
+        for doc_index in (self._doc_indexes or {}).values():
+            doc_index.dropped_candidate_indexes = {}
+            doc_index.candidate_budget_stats = None
+        self.anaphor_candidate_budget = budget
+        self.candidate_budget_stats = CandidateBudgetStats() if budget is not None else None
+        return self.candidate_budget_stats
+
+    def get_doc_candidate_budget_stats(self, doc: Doc) -> CandidateBudgetStats:
+        doc_index = self.get_doc_index(doc)
+        if doc_index.candidate_budget_stats is None:
+            doc_index.candidate_budget_stats = CandidateBudgetStats()
+        return doc_index.candidate_budget_stats
+
+    def get_referable_indexes(self, doc: Doc) -> np.ndarray:
+        """Returns the sorted indexes of the tokens of *doc* that may be referred to by an
+        anaphor: the independent nouns and the potential anaphors.
+        """
+        doc_index = self.get_doc_index(doc)
+        if doc_index.referable_indexes is None:
+            doc_index.referable_indexes = np.array([token.i for token in doc
+                if self.is_independent_noun(token) or self.is_potential_anaphor(token)],
+                dtype=np.int32)
+        return doc_index.referable_indexes
+
+    def get_anaphor_candidate_windows(self, doc: Doc) -> tuple:
+        """Returns the candidate windows of all potential anaphors of *doc*, worked out in
+        one pass, as a tuple of:
+
+        - the sorted indexes of the potential anaphors;
+        - for each of them, the positions in *get_referable_indexes()* where its window
+          starts and ends: the referable tokens from
+          *maximum_anaphora_sentence_referential_distance* sentences before its sentence up
+          to the end of its sentence, the anaphor itself included.
+        """
+        doc_index = self.get_doc_index(doc)
+        distance = self.maximum_anaphora_sentence_referential_distance
+        if distance not in doc_index.anaphor_candidate_windows:
+            referable_indexes = self.get_referable_indexes(doc)
+            anaphor_indexes = referable_indexes[np.fromiter(
+                (self.is_potential_anaphor(doc[index]) for index in referable_indexes.tolist()),
+                dtype=bool, count=len(referable_indexes))]
+            doc_index.anaphor_candidate_windows[distance] = (anaphor_indexes,) + \
+                self.get_sentence_windows(doc, referable_indexes, anaphor_indexes, distance)
+        return doc_index.anaphor_candidate_windows[distance]
+
+    def get_noun_candidate_windows(self, doc: Doc) -> tuple:
+        """Returns the candidate windows of all independent nouns of *doc*, worked out in
+        one pass, as a tuple of:
+
+        - the sorted indexes of the independent nouns;
+        - for each of them, the positions in that array where its window starts and ends:
+          the independent nouns before it from
+          *maximum_coreferring_nouns_sentence_referential_distance* sentences before its
+          sentence on.
+        """
+        doc_index = self.get_doc_index(doc)
+        distance = self.maximum_coreferring_nouns_sentence_referential_distance
+        if distance not in doc_index.noun_candidate_windows:
+            noun_indexes = np.array(self.get_independent_noun_indexes(doc), dtype=np.int32)
+            window_starts, _ = self.get_sentence_windows(doc, noun_indexes, noun_indexes,
+                distance)
+            doc_index.noun_candidate_windows[distance] = (noun_indexes, window_starts,
+                np.arange(len(noun_indexes), dtype=np.int32))
+        return doc_index.noun_candidate_windows[distance]
+
+    def get_anaphor_candidate_indexes(self, referring: Token) -> np.ndarray:
+        """Returns the indexes of the tokens that may be referred to by *referring* from
+        *maximum_anaphora_sentence_referential_distance* sentences before its sentence up to
+        the end of its sentence, *referring* excluded.
+        """
+        doc = referring.doc
+        referable_indexes = self.get_referable_indexes(doc)
+        anaphor_indexes, window_starts, window_ends = self.get_anaphor_candidate_windows(doc)
+        position = np.searchsorted(anaphor_indexes, referring.i)
+        if position < len(anaphor_indexes) and anaphor_indexes[position] == referring.i:
+            start, end = window_starts[position], window_ends[position]
+        else:
+            (start,), (end,) = self.get_sentence_windows(doc, referable_indexes,
+                np.array((referring.i,)), self.maximum_anaphora_sentence_referential_distance)
+        candidate_indexes = referable_indexes[start:end]
+        return candidate_indexes[candidate_indexes != referring.i]
+
+    def get_agreement_buckets(self, doc: Doc, directly: bool) -> tuple:
+        """Returns the tokens of *get_referable_indexes()* bucketed by the facts that
+        decide whether they may be referred to at all by a given anaphor, as a tuple of:
+
+        - the keys of the buckets, (masc, fem, sing, plur, person, entity type) tuples
+          made of the gender and number info of the tokens computed with *directly*,
+          *refers_to_person()* and *token.ent_type_*;
+        - the position of the bucket of every token of *doc* in the keys, -1 for the
+          tokens that are not referable;
+        - the sorted indexes of the tokens of each bucket.
+        """
+        doc_index = self.get_doc_index(doc)
+        agreement_buckets = doc_index.agreement_buckets.get(directly)
+        if agreement_buckets is None:
+            gender_number_infos = self.get_gender_number_infos(doc)[1 if directly else 0]
+            bucket_ids = np.full(len(doc), -1, dtype=np.int32)
+            bucket_positions = {}
+            bucket_indexes = []
+            for index in self.get_referable_indexes(doc).tolist():
+                token = doc[index]
+                key = tuple(gender_number_infos[index]) + (
+                    self.refers_to_person(token), token.ent_type_)
+                bucket_position = bucket_positions.setdefault(key, len(bucket_positions))
+                if bucket_position == len(bucket_indexes):
+                    bucket_indexes.append([])
+                bucket_indexes[bucket_position].append(index)
+                bucket_ids[index] = bucket_position
+            agreement_buckets = (tuple(bucket_positions), bucket_ids,
+                tuple(np.array(indexes, dtype=np.int32) for indexes in bucket_indexes))
+            doc_index.agreement_buckets[directly] = agreement_buckets
+        return agreement_buckets
+
+    def get_compatible_agreement_buckets(
+        self, referring: Token, directly: bool
+    ) -> np.ndarray:
+        """Returns a boolean array telling for each bucket of *get_agreement_buckets()*
+        whether its tokens may be referred to by *referring*. The single token mentions of
+        the other buckets are rejected by *is_potential_anaphoric_pair()* because they
+        don't agree in gender or number with *referring*, because they refer to persons
+        while *referring* is 'ici', 'là' or 'y' or because they are organisations, places
+        or other entities that are not persons while *referring* refers to a person.
+        """
+        doc = referring.doc
+        keys = self.get_agreement_buckets(doc, directly)[0]
+        referring_masc, referring_fem, referring_sing, referring_plur = \
+            self.get_gender_number_infos(doc)[1 if directly else 0][referring.i]
+        referring_facts = self.get_referring_facts(referring)
+        compatible = np.zeros(len(keys), dtype=bool)
+        for position, (masc, fem, sing, plur, is_person, ent_type) in enumerate(keys):
+            if not ((masc and referring_masc) or (fem and referring_fem)):
+                continue
+            if not ((sing and referring_sing) or (plur and referring_plur)):
+                continue
+            if masc and not fem and referring_fem and not referring_masc:
+                # "Le Masculin l'emporte"
+                continue
+            if referring_facts.is_locative and is_person:
+                continue
+            if referring_facts.refers_to_person and not is_person and \
+                    ent_type in ("ORG", "LOC", "MISC"):
+                continue
+            compatible[position] = True
+        return compatible
+
+    def get_agreeing_candidate_indexes(self, referring: Token, directly: bool) -> np.ndarray:
+        """Returns the sorted indexes of the tokens of the window of
+        *get_anaphor_candidate_indexes()* whose single token mentions may be referred to
+        by *referring*, gathered from the buckets of *get_compatible_agreement_buckets()*
+        only. The single token mentions of the other tokens of the window would be
+        rejected by *is_potential_anaphoric_pair()*.
+        """
+        doc = referring.doc
+        sentence_starts = self.get_sentence_starts(doc)
+        sentence_index = self.get_sentence_indexes(doc)[referring.i]
+        window_start = sentence_starts[max(
+            sentence_index - self.maximum_anaphora_sentence_referential_distance, 0)]
+        window_end = sentence_starts[sentence_index + 1]
+        bucket_indexes = self.get_agreement_buckets(doc, directly)[2]
+        candidate_indexes = []
+        for position in np.flatnonzero(
+                self.get_compatible_agreement_buckets(referring, directly)).tolist():
+            indexes = bucket_indexes[position]
+            start, end = np.searchsorted(indexes, (window_start, window_end))
+            candidate_indexes.append(indexes[start:end])
+        if len(candidate_indexes) == 0:
+            return np.zeros(0, dtype=np.int32)
+        candidate_indexes = np.sort(np.concatenate(candidate_indexes))
+        return candidate_indexes[candidate_indexes != referring.i]
+
+    def score_anaphor_candidates(
+        self, referring: Token, candidate_indexes: np.ndarray
+    ) -> np.ndarray:
+        """Returns cheap scores of the tokens at *candidate_indexes* as referreds of
+        *referring*, the higher the better, from the agreement of their gender and number,
+        the compatibility of their entity types and their distance in sentences.
+        """
+        doc = referring.doc
+        lexicon = self.lexicon
+        masc, fem, sing, plur = self.get_gender_number_matrix(doc)[0][candidate_indexes].T
+        referring_masc, referring_fem, referring_sing, referring_plur = \
+            self.get_gender_number_infos(doc)[0][referring.i]
+        agreeing = ((masc & referring_masc) | (fem & referring_fem)) & \
+            ((sing & referring_sing) | (plur & referring_plur))
+        lower_lemmas = self.get_token_features(doc).lower_lemmas
+        candidates = [doc[index] for index in candidate_indexes.tolist()]
+        is_person = np.fromiter((candidate.ent_type == lexicon.person_ent_type_id
+            or lower_lemmas[candidate.i] in lexicon.person_nouns for candidate in candidates),
+            dtype=bool, count=len(candidates))
+        if referring.lemma_ in ("ici", "là", "y"):
+            # places can't be persons
+            entity_compatible = ~is_person
+        elif self.refers_to_person(referring):
+            entity_compatible = is_person | np.fromiter(
+                (candidate.ent_type not in lexicon.non_person_ent_type_ids
+                    for candidate in candidates), dtype=bool, count=len(candidates))
+        else:
+            entity_compatible = np.ones(len(candidates), dtype=bool)
+        sentence_indexes = self.get_sentence_indexes(doc)
+        sentence_distances = np.abs(
+            sentence_indexes[referring.i] - sentence_indexes[candidate_indexes])
+        return (agreeing.astype(np.int32) * 2 + entity_compatible) * \
+            (self.maximum_anaphora_sentence_referential_distance + 1) - sentence_distances
+
+    def get_dropped_candidate_indexes(self, referring: Token) -> frozenset:
+        """Returns the indexes of the candidate referreds of *referring* left out by
+        *anaphor_candidate_budget*, which keeps the best scored candidates and the closest
+        ones among equals. Worked out once per referring token.
+        """
+        doc_index = self.get_doc_index(referring.doc)
+        dropped_indexes = doc_index.dropped_candidate_indexes.get(referring.i)
+        if dropped_indexes is None:
+            candidate_indexes = self.get_anaphor_candidate_indexes(referring)
+            budget = self.anaphor_candidate_budget
+            dropped_indexes = frozenset()
+            if len(candidate_indexes) > budget:
+                scores = self.score_anaphor_candidates(referring, candidate_indexes)
+                distances = np.abs(candidate_indexes - referring.i)
+                order = np.lexsort((distances, -scores))
+                dropped_indexes = frozenset(candidate_indexes[order[budget:]].tolist())
+            for candidate_budget_stats in (self.candidate_budget_stats,
+                    self.get_doc_candidate_budget_stats(referring.doc)):
+                if candidate_budget_stats is not None:
+                    candidate_budget_stats.record(len(candidate_indexes),
+                        len(candidate_indexes) - len(dropped_indexes))
+            doc_index.dropped_candidate_indexes[referring.i] = dropped_indexes
+        return dropped_indexes
+
+    def check_candidate_budget(
+        self, referred: Mention, referring: Token, directly: bool
+    ) -> int:
+        if self.anaphor_candidate_budget is not None and \
+                referred.root_index in self.get_dropped_candidate_indexes(referring):
+            return 0
+        return 2
+
+    def is_potential_anaphoric_pair(
+        self, referred: Mention, referring: Token, directly: bool
+    ) -> bool:
+        if self.rule_stats is None and self.rule_trace is None:
+            return self.get_anaphoric_pair_decision(referred, referring, directly)[0]
+        return self.record_rule_decision("is_potential_anaphoric_pair", referring.doc,
+            self.get_anaphoric_pair_decision, referred, referring, directly)
+
+    def score_anaphoric_pairs(
+        self, referring: Token, referreds: list, directly: bool
+    ) -> np.ndarray:
+        """Returns an array holding *is_potential_anaphoric_pair(referred, referring,
+        directly)* (0, 1 or 2) for each mention of *referreds*. The facts about *referring*
+        are worked out once, the agreement of all mentions is checked in bulk and only the
+        agreeing mentions go through the other checks.
+        """
+        scores = np.zeros(len(referreds), dtype=np.int8)
+        if len(referreds) == 0:
+            return scores
+        if self.rule_stats is not None or self.rule_trace is not None:
+            # every pair is to be recorded
+            for position, referred in enumerate(referreds):
+                scores[position] = self.is_potential_anaphoric_pair(
+                    referred, referring, directly)
+            return scores
+        self.get_referring_facts(referring)
+        # the checks being independent, a pair rejected by one of them is rejected: the
+        # single token mentions outside the compatible buckets are skipped and the
+        # agreement of the others is checked in bulk
+        bucket_ids = self.get_agreement_buckets(referring.doc, directly)[1]
+        compatible = self.get_compatible_agreement_buckets(referring, directly)
+        positions = [position for position, referred in enumerate(referreds)
+            if len(referred.token_indexes) > 1 or bucket_ids[referred.root_index] < 0
+            or compatible[bucket_ids[referred.root_index]]]
+        agreeing = self.get_anaphoric_agreement_mask(
+            referring, [referreds[position] for position in positions], directly)
+        for position in np.flatnonzero(agreeing).tolist():
+            scores[positions[position]] = self.get_anaphoric_pair_decision(
+                referreds[positions[position]], referring, directly)[0]
+        return scores
+
+    def get_anaphoric_pair_decision(
+        self, referred: Mention, referring: Token, directly: bool
+    ) -> tuple:
+        """Returns the result of *is_potential_anaphoric_pair()* (0, 1 or 2) along with the
+        name of the rule branch that decided it, see *RuleStats*.
+
+        The independent checks that may reject the pair are run one after the other in the
+        order of *anaphoric_pair_stages* until one of them rejects it. As none of them
+        depends on the others, the order does not change the result.
+        """
+        if self.anaphoric_pair_stage_stats is not None or self.adaptive_anaphoric_pair_stages:
+            stage_stats = self.get_anaphoric_pair_stage_profile()
+            if stage_stats is not None:
+                return self.get_profiled_anaphoric_pair_decision(
+                    referred, referring, directly, stage_stats)
+        result = 2
+        for stage_name, directly_only, check in self.get_anaphoric_pair_stage_checks():
+            if directly_only and not directly:
+                continue
+            stage_result = check(referred, referring, directly)
+            if not stage_result:
+                return stage_result, stage_name
+            if stage_result < result:
+                result = stage_result
+        return self.get_anaphoric_pair_final_decision(referred, referring, result)
+
+    def get_anaphoric_pair_final_decision(
+        self, referred: Mention, referring: Token, result: int
+    ) -> tuple:
+        """Returns the decision on a pair that no stage rejected, *result* being 1 if a
+        stage found it uncertain and 2 otherwise.
+        """
+        doc = referring.doc
+        referred_root = doc[referred.root_index]
+        if self.get_referring_facts(referring).has_personal_subject_verb:
+            for working_token in (doc[index] for index in referred.token_indexes):
+                if self.refers_to_person(working_token):
+                    return 2, "personal_subject_verb"
+            if referred_root.pos == "NOUN":
+                result = 1
+
+        return (1, "uncertain") if result == 1 else (2, "compatible")
+
+    # The checks of is_potential_anaphoric_pair() that may reject a pair, in the order
+    # they are run, see order_anaphoric_pair_stages(). For each stage: its name, whether it
+    # only applies when the pair is checked directly, and the name of the method, which
+    # returns 0 (or False) to reject the pair, 1 if the pair is uncertain and 2 otherwise.
+    anaphoric_pair_stages = (
+        ("candidate_budget", False, "check_candidate_budget"),
+        ("quelqu_un_cataphora", False, "check_quelqu_un_cataphora"),
+        ("possessive_of_referred", False, "check_possessive_of_referred"),
+        ("gender_number", False, "check_gender_number"),
+        ("locative", False, "check_locative"),
+        ("possessive_determiner", True, "check_possessive_determiner"),
+        ("celui_ci", True, "check_celui_ci"),
+        ("celui_la", True, "check_celui_la"),
+        ("partitive_en", True, "check_partitive_en"),
+        ("pronoun_entity", True, "check_pronoun_entity"),
+        ("non_reflexive_binding", True, "check_non_reflexive_binding"),
+        ("reflexive_binding", True, "check_reflexive_binding"),
+        ("person_referring_non_person", False, "check_person_referring_non_person"),
+    )
+
+    # RuleStats of the stages of is_potential_anaphoric_pair() while they are profiled, see
+    # profile_anaphoric_pair_stages()
+    anaphoric_pair_stage_stats = None
+
+    # Whether the stages of is_potential_anaphoric_pair() are reordered as the analyzer
+    # goes, from the profile of one pair every *adaptive_stage_sampling_interval* pairs,
+    # every *adaptive_stage_reordering_interval* pairs
+    adaptive_anaphoric_pair_stages = False
+
+    adaptive_stage_sampling_interval = 50
+
+    adaptive_stage_reordering_interval = 5000
+
+    _anaphoric_pair_stage_checks = None
+
+    def get_anaphoric_pair_stage_checks(self) -> list:
+        """Returns the stages of *anaphoric_pair_stages* with their bound check methods."""
+        stage_checks = self._anaphoric_pair_stage_checks
+        if stage_checks is None or stage_checks[0] is not self.anaphoric_pair_stages:
+            stage_checks = self._anaphoric_pair_stage_checks = (
+                self.anaphoric_pair_stages,
+                [(stage_name, directly_only, getattr(self, method_name))
+                    for stage_name, directly_only, method_name in self.anaphoric_pair_stages])
+        return stage_checks[1]
+
+    def profile_anaphoric_pair_stages(self) -> RuleStats:
+        """Starts timing every stage of *is_potential_anaphoric_pair()* on every pair,
+        including the stages after the one that rejects the pair, so that the rejection
+        rates of the stages do not depend on their order. Returns the stats, whose
+        decisions are the number of times each stage was run.
+        """
+        if self.anaphoric_pair_stage_stats is None:
+            self.anaphoric_pair_stage_stats = RuleStats()
+        return self.anaphoric_pair_stage_stats
+
+    def stop_profiling_anaphoric_pair_stages(self) -> None:
+        self.anaphoric_pair_stage_stats = None
+
+    def order_anaphoric_pair_stages(self, stage_stats: RuleStats = None) -> tuple:
+        """Orders the stages of *is_potential_anaphoric_pair()* by increasing expected cost
+        of rejecting a pair, i.e. the time a stage takes divided by the share of the pairs
+        it rejects, based on *stage_stats* (by default those of the profiling run in
+        progress). The stages that never rejected a pair come last in their former order.
+        Returns the new order, which can also be assigned to *anaphoric_pair_stages* of
+        other analyzers.
+        """
+        if stage_stats is None:
+            stage_stats = self.anaphoric_pair_stage_stats
+        branches = stage_stats.branches if stage_stats is not None else {}
+
+        def expected_cost(stage: tuple) -> float:
+            decisions, rejections, seconds = branches.get(
+                ("is_potential_anaphoric_pair", stage[0]), (0, 0, 0.0))
+            if rejections == 0:
+                return float("inf")
+            return seconds / rejections
+
+        self.anaphoric_pair_stages = tuple(sorted(self.anaphoric_pair_stages, key=expected_cost))
+        return self.anaphoric_pair_stages
+
+    _adaptive_stage_pairs = 0
+
+    _adaptive_stage_stats = None
+
+    def get_traced_anaphoric_pair_decision(
+        self, referred: Mention, referring: Token, directly: bool
+    ) -> tuple:
+        """Does the work of *get_anaphoric_pair_decision()* also returning the stages run
+        as *[stage name, result]* pairs.
+        """
+        path = []
+        result = 2
+        for stage_name, directly_only, check in self.get_anaphoric_pair_stage_checks():
+            if directly_only and not directly:
+                continue
+            stage_result = check(referred, referring, directly)
+            path.append([stage_name, int(stage_result)])
+            if not stage_result:
+                return stage_result, stage_name, path
+            if stage_result < result:
+                result = stage_result
+        return self.get_anaphoric_pair_final_decision(referred, referring, result) + (path,)
+
+    def get_anaphoric_pair_stage_profile(self) -> RuleStats:
+        """Returns the stats the stages of the next pair are to be recorded in, or *None* if
+        the pair is not profiled. In adaptive mode, counts the pair and reorders the stages
+        every *adaptive_stage_reordering_interval* pairs.
+        """
+        if not self.adaptive_anaphoric_pair_stages:
+            return self.anaphoric_pair_stage_stats
+        self._adaptive_stage_pairs += 1
+        if self._adaptive_stage_stats is None:
+            self._adaptive_stage_stats = RuleStats()
+        if self._adaptive_stage_pairs % self.adaptive_stage_reordering_interval == 0:
+            self.order_anaphoric_pair_stages(self._adaptive_stage_stats)
+        if self.anaphoric_pair_stage_stats is not None:
+            return self.anaphoric_pair_stage_stats
+        if self._adaptive_stage_pairs % self.adaptive_stage_sampling_interval == 0:
+            return self._adaptive_stage_stats
+        return None
+
+    def get_profiled_anaphoric_pair_decision(
+        self, referred: Mention, referring: Token, directly: bool, stage_stats: RuleStats
+    ) -> tuple:
+        """Does the work of *get_anaphoric_pair_decision()* running all the stages and
+        recording them in *stage_stats*.
+        """
+        rejection = None
+        result = 2
+        for stage_name, directly_only, check in self.get_anaphoric_pair_stage_checks():
+            if directly_only and not directly:
+                continue
+            start = perf_counter()
+            stage_result = check(referred, referring, directly)
+            stage_stats.record("is_potential_anaphoric_pair", stage_name, not stage_result,
+                perf_counter() - start)
+            if not stage_result:
+                if rejection is None:
+                    rejection = stage_result, stage_name
+            elif stage_result < result:
+                result = stage_result
+        if rejection is not None:
+            return rejection
+        return self.get_anaphoric_pair_final_decision(referred, referring, result)
+
+    def get_referring_facts(self, referring: Token) -> ReferringFacts:
+        """Returns the facts about *referring* that the checks read for every pair,
+        worked out once per referring token.
+        """
+        doc_index = self.get_doc_index(referring.doc)
+        referring_facts = doc_index.referring_facts.get(referring.i)
+        if referring_facts is None:
+            is_potential_anaphor = self.is_potential_anaphor(referring)
+            lower_lemmas = self.get_token_features(referring.doc).lower_lemmas
+            is_celui_ci = is_celui_la = False
+            try:
+                is_celui_ci = is_potential_anaphor and (
+                    referring.lemma_ == "celui-ci"
+                    or lower_lemmas[referring.i] == "dernier"
+                    or (
+                        lower_lemmas[referring.i] == "celui"
+                        and (
+                            lower_lemmas[referring.i + 1] in ("-ci", "ci")
+                            or (
+                                referring.nbor(1).text == "-"
+                                and lower_lemmas[referring.i + 2] == "ci"
+                            )
+                        )
+                    )
+                )
+            except IndexError:
+                # doc shorter than the compared index
+                pass
+            try:
+                is_celui_la = is_potential_anaphor and (
+                    referring.lemma_ == "celui"
+                    and len(referring.doc) >= referring.i + 1
+                    and lower_lemmas[referring.i + 1] in ("-là", "là")
+                )
+            except IndexError:
+                pass
+            referring_governing_sibling = referring
+            if referring._.coref_chains.temp_governing_sibling is not None:
+                referring_governing_sibling = (
+                    referring._.coref_chains.temp_governing_sibling
+                )
+            referring_facts = ReferringFacts(
+                is_potential_anaphor=is_potential_anaphor,
+                refers_to_person=self.refers_to_person(referring),
+                is_possessive=self.has_morph(referring, "Pos", "Yes"),
+                is_locative=is_potential_anaphor and referring.lemma_ in ("ici", "là", "y"),
+                is_third_person_pronoun=referring.pos_ == "PRON"
+                    and self.has_packed_morph(referring, "Person", "3")
+                    and self.has_packed_morph(referring, "Number"),
+                is_celui_ci=bool(is_celui_ci),
+                is_celui_la=bool(is_celui_la),
+                is_partitive_en=is_potential_anaphor and referring.lemma_ == "en",
+                has_personal_subject_verb=referring_governing_sibling.dep_
+                    in ("nsubj:pass", "nsubj")
+                    and referring_governing_sibling.head.lemma_
+                    in self.lexicon.verbs_with_personal_subject,
+            )
+            doc_index.referring_facts[referring.i] = referring_facts
+        return referring_facts
+
+    def check_quelqu_un_cataphora(
+        self, referred: Mention, referring: Token, directly: bool
+    ) -> int:
+        if self.is_quelqun_head(referring.doc[referred.root_index]) and \
+                referred.root_index > referring.i:
+            # qqn can't be cataphoric
+            return 0
+        return 2
+
+    def check_possessive_of_referred(
+        self, referred: Mention, referring: Token, directly: bool
+    ) -> int:
+        referred_root = referring.doc[referred.root_index]
+        if (
+            self.get_referring_facts(referring).is_possessive
+            and referring.head == referred_root
+            and referred_root.lemma_ != "personne"
+        ):
+            # possessive can't be determiner of its own reference
+            # * mon moi-même.
             return 0
+        return 2
 
+    def check_gender_number(self, referred: Mention, referring: Token, directly: bool) -> int:
+        referring_info = self.get_gender_number_info(referring, directly=directly)
+        if self.get_referred_gender_number_info(
+                referred, referring, referring_info, directly) is None:
+            return 0
+        return 2
+
+    def check_locative(self, referred: Mention, referring: Token, directly: bool) -> int:
         #'ici , là... cannot refer to person. only loc and  possibly orgs
         # y needs more conditions
-        if self.is_potential_anaphor(referring) and referring.lemma_ in (
-            "ici",
-            "là",
-            "y",
-        ):
+        referred_root = referring.doc[referred.root_index]
+        result = 2
+        if self.get_referring_facts(referring).is_locative:
             if (
                 not self.is_independent_noun(referred_root)
                 and referred_root.lemma_ not in ["ici","là","y"]
@@ -585,143 +1780,131 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             if self.refers_to_person(referred_root):  
                 return 0
             if referred_root.ent_type_ == "ORG" and referring.lemma_ != "y":
-                uncertain = True
+                result = 1
             referred_ent_type = self.reverse_entity_noun_dictionary.get(referred_root) 
             if referred_ent_type in ("PER","ORG"):
-                uncertain = True
-
-
-        if directly:
-            # possessive det can't be referred to directly
-            if self.has_morph(referred_root, "Poss") and referred_root.pos_ == "DET": return False
-            if self.is_potential_anaphor(referring) > 0:
-                try:
-                    if (
-                        referring.lemma_ == "celui-ci"
-                        or referring.lemma_.lower() == "dernier"
-                        or (
-                            referring.lemma_.lower() == "celui"
-                            and (
-                                referring.nbor(1).lemma_.lower() in ("-ci", "ci")
-                                or (
-                                    referring.nbor(1).text == "-"
-                                    and referring.nbor(2).lemma_.lower() == "ci"
-                                )
-                            )
-                        )
-                    ):
-                        #'celui-ci' and 'ce dernier' can only refer to last grammatically compatible noun phrase
-                        if referring.i == 0:
-                            return 0
-                        for previous_token_index in range(referring.i - 1, 0, -1):
-                            previous_token = doc[previous_token_index]
-                            if self.is_independent_noun(previous_token) and \
-                                self.is_potential_anaphoric_pair(Mention(previous_token), referring, directly=False):
-                                if previous_token_index != referred.root_index :
-                                    if previous_token.dep_ in ("nmod", "appos"):
-                                        continue
-                                    # Except if noun phrase is modifier of other noun phrase
-                                    # eg: "Le président du pays... ce dernier" can refer to both nouns
-                                    return 0
-                                break
-
-                    if (
-                        referring.lemma_ == "celui"
-                        and len(doc) >= referring.i + 1
-                        and referring.nbor(1).lemma_.lower() in ("-là", "là")
-                    ):
-                        #'celui-là' refers to second to last noun phrase or before (but not too far)
-                        noun_phrase_count = 0
-                        if referring.i == 0:
-                            return 0
-                        for previous_token_index in range(referring.i - 1, 0, -1):
-
-                            if (
-                                self.is_independent_noun(doc[previous_token_index])
-                                and previous_token_index in referred.token_indexes
-                            ):
-                                if noun_phrase_count < 1:
-                                    return 0
-                            elif self.is_independent_noun(doc[previous_token_index]):
-                                noun_phrase_count += 1
-                            if noun_phrase_count > 2:
-                                return 0
-                except IndexError:
-                    # doc shorter than the compared index
-                    pass
-                if referring.lemma_ == "en":
-                    # requires list of mass/countable nouns to be implemented
-                    if not referred_plur and (self.refers_to_person(referred_root)):
-                        uncertain = True
+                result = 1
+        return result
 
-            if (
-                referring.pos_ == "PRON" and self.has_morph(referring, "Person", "3") and
-                self.has_morph(referring,"Number") and not self.refers_to_person(referred_root)
-            ):
-                #Some semantic restrictions on named entities / pronoun pair
-                if referred_root.ent_type_ == "ORG" and referred_root.pos_ in self.propn_pos\
-                    and not self.has_det(referred_root) and not \
-                    any(prep for prep in referred_root.children if prep.dep_ == 'case'):
-                    # "Twitter ... Il " is not possible
-                    return False
-                if (
-                    referred_root.ent_type_ in {"LOC","MISC"} and referred_root.pos_ in self.propn_pos
-                    and not self.has_det(referred_root) and not
-                    any(prep for prep in referred_root.children if prep.dep_ == 'case')
-                ):
-                    # "Paris... elle" is possible but unlikely
-                    # Except for cases when the toponym has a determiner, such as most country name
-                    # "La France...elle" is ok. Same for cities with det : "Le Havre... il"
-                    uncertain = True
+    def check_possessive_determiner(
+        self, referred: Mention, referring: Token, directly: bool
+    ) -> int:
+        # possessive det can't be referred to directly
+        referred_root = referring.doc[referred.root_index]
+        if self.has_packed_morph(referred_root, "Poss") and referred_root.pos_ == "DET": return False
+        return 2
 
-            if (
-                self.is_potential_reflexive_pair(referred, referring)
-                and self.is_reflexive_anaphor(referring) == 0
-                and not self.has_morph(referred_root, "Poss", "Yes")
-            ):
-                # * Les hommes le voyaient. "le" can't refer to "hommes"
-                #print("SUSUSUSU", referred, referring)
+    def check_celui_ci(self, referred: Mention, referring: Token, directly: bool) -> int:
+        if self.get_referring_facts(referring).is_celui_ci:
+            #'celui-ci' and 'ce dernier' can only refer to last grammatically compatible noun phrase
+            if referring.i == 0:
                 return 0
+            last_noun_index, compatible_noun_indexes = \
+                self.get_last_compatible_noun(referring)
+            if last_noun_index != -1 and \
+                    referred.root_index not in compatible_noun_indexes:
+                return 0
+        return 2
 
-            if self.is_potential_reflexive_pair(referred, referring) == 0 and (
-                self.is_reflexive_anaphor(referring) == 2
-            ):
-                # * Les hommes étaient sûrs qu'ils se trompaient. "se" can't directly refer to "hommes"
+    def check_celui_la(self, referred: Mention, referring: Token, directly: bool) -> int:
+        if self.get_referring_facts(referring).is_celui_la:
+            #'celui-là' refers to second to last noun phrase or before (but not too far)
+            if referring.i == 0:
+                return 0
+            doc = referring.doc
+            referred_noun_indexes = [
+                index for index in referred.token_indexes
+                if 0 < index < referring.i and self.is_independent_noun(doc[index])
+            ]
+            # there must be another noun phrase after the referred one ...
+            if len(referred_noun_indexes) > 0 and self.count_independent_nouns(
+                doc, max(referred_noun_indexes) + 1, referring.i
+            ) < 1:
                 return 0
+            # ... but not more than two before 'celui-là'
+            if self.count_independent_nouns(doc, 1, referring.i) - \
+                    len(referred_noun_indexes) > 2:
+                return 0
+        return 2
+
+    def check_partitive_en(self, referred: Mention, referring: Token, directly: bool) -> int:
+        if self.get_referring_facts(referring).is_partitive_en:
+            # requires list of mass/countable nouns to be implemented
+            referring_info = self.get_gender_number_info(referring, directly=directly)
+            referred_info = self.get_referred_gender_number_info(
+                referred, referring, referring_info, directly)
+            # a pair whose numbers do not agree is rejected by check_gender_number()
+            if referred_info is not None and not referred_info[3] and \
+                    self.refers_to_person(referring.doc[referred.root_index]):
+                return 1
+        return 2
+
+    def check_pronoun_entity(self, referred: Mention, referring: Token, directly: bool) -> int:
+        referred_root = referring.doc[referred.root_index]
+        if (
+            self.get_referring_facts(referring).is_third_person_pronoun
+            and not self.refers_to_person(referred_root)
+        ):
+            #Some semantic restrictions on named entities / pronoun pair
+            if referred_root.ent_type_ == "ORG" and \
+                referred_root.pos in self.lexicon.propn_pos_ids\
+                and not self.has_det(referred_root) and not \
+                any(prep for prep in referred_root.children if prep.dep_ == 'case'):
+                # "Twitter ... Il " is not possible
+                return False
+            if (
+                referred_root.ent_type_ in {"LOC","MISC"} and
+                referred_root.pos in self.lexicon.propn_pos_ids
+                and not self.has_det(referred_root) and not
+                any(prep for prep in referred_root.children if prep.dep_ == 'case')
+            ):
+                # "Paris... elle" is possible but unlikely
+                # Except for cases when the toponym has a determiner, such as most country name
+                # "La France...elle" is ok. Same for cities with det : "Le Havre... il"
+                return 1
+        return 2
 
-        if self.refers_to_person(referring) and not self.refers_to_person(referred_root):
+    def check_non_reflexive_binding(
+        self, referred: Mention, referring: Token, directly: bool
+    ) -> int:
+        if (
+            self.is_potential_reflexive_pair(referred, referring)
+            and self.is_reflexive_anaphor(referring) == 0
+            and not self.has_packed_morph(referring.doc[referred.root_index], "Poss", "Yes")
+        ):
+            # * Les hommes le voyaient. "le" can't refer to "hommes"
+            return 0
+        return 2
+
+    def check_reflexive_binding(self, referred: Mention, referring: Token, directly: bool) -> int:
+        if self.is_potential_reflexive_pair(referred, referring) == 0 and (
+            self.is_reflexive_anaphor(referring) == 2
+        ):
+            # * Les hommes étaient sûrs qu'ils se trompaient. "se" can't directly refer to "hommes"
+            return 0
+        return 2
+
+    def check_person_referring_non_person(
+        self, referred: Mention, referring: Token, directly: bool
+    ) -> int:
+        referred_root = referring.doc[referred.root_index]
+        if self.get_referring_facts(referring).refers_to_person and \
+                not self.refers_to_person(referred_root):
                 # Le Luxembourg... Il mange ... -> impossible
             if referred_root.ent_type_ in {"ORG", "LOC", "MISC"} :
                 return False
             # Le Balcon... il mange... -> impossible but some other nouns are dubious
             if referred_root.pos_ == "NOUN" :
-                uncertain = True
-                
-        referring_governing_sibling = referring
-        if referring._.coref_chains.temp_governing_sibling is not None:
-            referring_governing_sibling = (
-                referring._.coref_chains.temp_governing_sibling
-            )
-        if (
-            referring_governing_sibling.dep_ in ("nsubj:pass", "nsubj")
-            and referring_governing_sibling.head.lemma_
-            in self.verbs_with_personal_subject
-        ):
-            for working_token in (doc[index] for index in referred.token_indexes):
-                if self.refers_to_person(working_token):
-                    return 2
-            if referred_root.pos == "NOUN":
-                uncertain = True
-
-        return 1 if uncertain else 2
+                return 1
+        return 2
 
     def has_operator_child_with_any_morph(self, token: Token, morphs: dict):
         for child in (
             child for child in token.children if 
-            child.pos_ in self.term_operator_pos + ("ADP",)
+            child.pos in self.lexicon.operator_pos_ids
         ):
             for morph in morphs:
-                if self.has_morph(child, morph, morphs.get(morph)):
+                if self.has_packed_morph(child, morph, morphs.get(morph)):
                     return True
         return False
 
@@ -737,6 +1920,10 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         )
 
     def is_reflexive_anaphor(self, token: Token) -> int:
+        return 2 if self.get_doc_index(token.doc).reflexive_anaphors.get(
+            token, lambda token: self._is_reflexive_anaphor(token) == 2) else 0
+
+    def _is_reflexive_anaphor(self, token: Token) -> int:
         if (
             token.lemma_ == "personne"
             and len(
@@ -745,7 +1932,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                     for det in token.children
                     if det.pos_ == "DET"
                     and self.has_morph("Poss", "Yes")
-                    and self.has_morph(token, "Person", "3")
+                    and self.has_packed_morph(token, "Person", "3")
                 ]
             )
             > 0
@@ -754,8 +1941,8 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             return 2
         if self.is_emphatic_reflexive_anaphor(token):
             return 2
-        if self.has_morph(token, "Reflex", "Yes"):
-            if self.has_morph(token, "Person", "3"):
+        if self.has_packed_morph(token, "Reflex", "Yes"):
+            if self.has_packed_morph(token, "Person", "3"):
                 return 2
 
         return 0
@@ -767,6 +1954,60 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         head = token.head
         return head
 
+    def get_clause_labels(self, doc: Doc) -> tuple:
+        """Labels every token with the binding domain a subject of its clause can reflexively
+        refer into, as a tuple of:
+
+        - the clause heads: index of the closest ancestor with a subject ('nsubj',
+          'nsubj:pass'), *NO_CLAUSE_HEAD* if there is none and *DISJOINTED_CLAUSE_HEAD*
+          if a disjointed ancestor ('dislocated', 'parataxis' ...) comes first;
+        - the relative clause attachments: for each token, the indexes of the heads of the
+          relative clauses ('acl', 'acl:relcl' verbs) among those ancestors;
+        - whether the token has a 'selon' case marker child ('selon lui').
+
+        The labels are worked out in a single pass over the heads.
+        """
+        doc_index = self.get_doc_index(doc)
+        if doc_index.clause_labels is not None:
+            return doc_index.clause_labels
+        lexicon = self.lexicon
+        disjointed_dep_ids = lexicon.disjointed_dep_ids
+        clause_root_pos_ids = lexicon.clause_root_pos_ids
+        relative_clause_dep_ids = get_ids(("acl:relcl", "acl"))
+        subject_dep_ids = get_ids(("nsubj", "nsubj:pass"))
+        subject_heads = {token.head.i for token in doc
+            if token.dep in subject_dep_ids and token.head.i != token.i}
+        clause_heads = np.full(len(doc), self.NO_CLAUSE_HEAD, dtype=np.int32)
+        relative_clause_heads = [()] * len(doc)
+        labelled = np.zeros(len(doc), dtype=bool)
+        for token in doc:
+            # climb to the first ancestor whose labels are known, then label on the way down
+            chain = []
+            while not labelled[token.i]:
+                chain.append(token)
+                labelled[token.i] = True
+                if token.head.i == token.i:
+                    break
+                token = token.head
+            for token in reversed(chain):
+                head = token.head
+                if head.i == token.i:
+                    continue
+                if head.dep in disjointed_dep_ids:
+                    clause_heads[token.i] = self.DISJOINTED_CLAUSE_HEAD
+                    continue
+                if head.pos in clause_root_pos_ids and head.dep in relative_clause_dep_ids:
+                    relative_clause_heads[token.i] = (head.head.i,)
+                if head.i in subject_heads:
+                    clause_heads[token.i] = head.i
+                else:
+                    clause_heads[token.i] = clause_heads[head.i]
+                    relative_clause_heads[token.i] += relative_clause_heads[head.i]
+        has_selon_case = np.array([any(child.lemma_ == "selon" and child.dep_ == "case"
+            for child in token.children) for token in doc], dtype=bool)
+        doc_index.clause_labels = (clause_heads, relative_clause_heads, has_selon_case)
+        return doc_index.clause_labels
+
     def is_potential_reflexive_pair(self, referred: Mention, referring: Token) -> bool:
         if (
             referring.pos_ != "PRON"
@@ -775,7 +2016,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         ):
             return False
 
-        if  referring.dep_ in self.disjointed_dep:
+        if  referring.dep in self.lexicon.disjointed_dep_ids:
             return False
 
         referred_root = referring.doc[referred.root_index]
@@ -786,36 +2027,20 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         if referring._.coref_chains.temp_governing_sibling is not None:
             referring = referring._.coref_chains.temp_governing_sibling
         
-        if referred_root.dep_ in ("nsubj", "nsubj:pass") and \
-            not any(selon for selon in referring.children 
-            if selon.lemma_ == "selon" and selon.dep_ == "case"):
-
-            for referring_ancestor in referring.ancestors:
-                # Loop up through the verb ancestors of the pronoun
-                if referring_ancestor.dep_ in self.disjointed_dep: 
-                    return False
-                if referred_root in referring_ancestor.children:
+        if referred_root.dep_ in ("nsubj", "nsubj:pass"):
+            clause_heads, relative_clause_heads, has_selon_case = \
+                self.get_clause_labels(referring.doc)
+            if not has_selon_case[referring.i]:
+                # The subject of the clause of the pronoun, up to the first disjointed
+                # ancestor
+                if clause_heads[referring.i] == referred_root.head.i:
                     return True
-                # Relative clauses
-                if (
-                    referring_ancestor.pos_ in ("VERB", "AUX")
-                    and referring_ancestor.dep_ in ("acl:relcl", "acl")
-                    and (
-                        referring_ancestor.head == referred_root
-                        or referring_ancestor.head.i in referred.token_indexes
-                    )
-                ):
-                    return True
-
-                # The ancestor has its own subject, so stop here
-                subjects =  [
-                            t
-                            for t in referring_ancestor.children
-                            if t.dep_ in ("nsubj", "nsubj:pass") 
-                        ]
-                if any(subjects) and referred_root not in subjects:
-                    return False
-            return False
+                # Relative clauses attached to the referred mention
+                return any(
+                    relative_clause_head == referred_root.i
+                    or relative_clause_head in referred.token_indexes
+                    for relative_clause_head in relative_clause_heads[referring.i]
+                )
 
         if referring.i < referred_root.i:
             return False
@@ -840,59 +2065,133 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         doc = referring.doc
         referred_root = doc[referred.root_index]
 
-        if referred_root.sent != referring.sent:
+        sentence_indexes = self.get_sentence_indexes(doc)
+        if sentence_indexes[referred_root.i] != sentence_indexes[referring.i]:
             return False
         if self.is_potential_anaphor(referred_root):
             return False
 
-        referred_verb_ancestors = []
-        # Find the ancestors of the referent that are verbs, stopping anywhere where there
-        # is conjunction between verbs
-        for ancestor in referred_root.ancestors:
-            if ancestor.pos_ in self.clause_root_pos or any(
-                child for child in ancestor.children if child.dep_ == "cop"
-            ):
-                referred_verb_ancestors.append(ancestor)
-            if ancestor.dep_ in self.dependent_sibling_deps:
-                break
-
-        # Loop through the ancestors of the referring pronoun that are verbs,  that are not
-        # within the first list and that have an adverbial clause dependency label
-        referring_inclusive_ancestors = [referring]
-        referring_inclusive_ancestors.extend(referring.ancestors)
-        if (
-            len(
-                [
-                    1
-                    for ancestor in referring_inclusive_ancestors
-                    if ancestor.dep_ in self.adverbial_clause_deps
-                ]
-            )
-            == 0
-        ):
+        referring_chain, referring_clause_chain, is_adverbial = \
+            self.get_cataphora_chain(referring)
+        if not is_adverbial:
             return False
-        for referring_verb_ancestor in (
-            t
-            for t in referring_inclusive_ancestors
-            if t not in referred_verb_ancestors
-            and t.pos_ in self.clause_root_pos + self.noun_pos + ("ADJ",)
-        ):
-            # If one of the elements of the second list has one of the elements of the first list
-            # within its ancestors, we have subordination and cataphora is permissible
-            if (
-                len(
-                    [
-                        t
-                        for t in referring_verb_ancestor.ancestors
-                        if t in referred_verb_ancestors
-                    ]
+        common_ancestor = self.get_lowest_common_ancestor(referring, referred_root)
+        if common_ancestor is None:
+            return False
+        # the tokens of the referring chain below the lowest common ancestor are not
+        # ancestors of the referent
+        common_position = referring_chain.index(common_ancestor.i)
+        referred_verb_ancestors = self.get_referred_verb_ancestors(referred_root)
+        # If one of the verb, noun or adjective inclusive ancestors of the referring pronoun
+        # that is not itself a verb ancestor of the referent has one of them within its
+        # ancestors, we have subordination and cataphora is permissible
+        for position in range(len(referring_chain) - 1, max(common_position, 1) - 1, -1):
+            if referring_chain[position] in referred_verb_ancestors:
+                return any(
+                    referring_clause_chain[lower_position]
+                    and (lower_position < common_position
+                        or referring_chain[lower_position] not in referred_verb_ancestors)
+                    for lower_position in range(position)
                 )
-                > 0
-            ):
-                return True
         return False
 
+    def get_referred_verb_ancestors(self, token: Token) -> frozenset:
+        """Returns the indexes of the ancestors of *token* that are verbs or have a copula,
+        stopping anywhere where there is conjunction between verbs.
+        """
+        doc_index = self.get_doc_index(token.doc)
+        referred_verb_ancestors = doc_index.referred_verb_ancestors.get(token.i)
+        if referred_verb_ancestors is None:
+            doc = token.doc
+            lexicon = self.lexicon
+            referred_verb_ancestor_list = []
+            for ancestor_index in self.get_ancestor_indexes(token):
+                ancestor = doc[ancestor_index]
+                if ancestor.pos in lexicon.clause_root_pos_ids or any(
+                    child for child in ancestor.children if child.dep_ == "cop"
+                ):
+                    referred_verb_ancestor_list.append(ancestor_index)
+                if ancestor.dep in lexicon.dependent_sibling_dep_ids:
+                    break
+            referred_verb_ancestors = frozenset(referred_verb_ancestor_list)
+            doc_index.referred_verb_ancestors[token.i] = referred_verb_ancestors
+        return referred_verb_ancestors
+
+    def get_cataphora_chain(self, token: Token) -> tuple:
+        """Returns the indexes of *token* and its ancestors, whether each of them is a verb,
+        a noun or an adjective, and whether any of them has an adverbial clause dependency
+        label.
+        """
+        doc_index = self.get_doc_index(token.doc)
+        cataphora_chain = doc_index.cataphora_chains.get(token.i)
+        if cataphora_chain is None:
+            doc = token.doc
+            lexicon = self.lexicon
+            inclusive_chain = (token.i,) + self.get_ancestor_indexes(token)
+            cataphora_chain = (
+                inclusive_chain,
+                tuple(doc[index].pos in lexicon.clause_pos_ids for index in inclusive_chain),
+                any(doc[index].dep in lexicon.adverbial_clause_dep_ids
+                    for index in inclusive_chain),
+            )
+            doc_index.cataphora_chains[token.i] = cataphora_chain
+        return cataphora_chain
+
     def get_propn_subtree(self, token:Token) -> list:
+        proper_name = self.get_proper_names(token.doc).get(token.i)
+        if proper_name is None:
+            return []
+        return [token.doc[index] for index in proper_name.token_indexes]
+
+    def get_proper_names(self, doc: Doc) -> dict:
+        """Returns a dictionary from the index of each token with a non-empty proper noun
+        subtree to its *ProperName*. The subtrees are worked out once per doc.
+        """
+        doc_index = self.get_doc_index(doc)
+        if doc_index.proper_names is None:
+            proper_names = {}
+            for token in doc:
+                propn_subtree = self._get_propn_subtree(token)
+                if len(propn_subtree) > 0:
+                    proper_names[token.i] = ProperName(propn_subtree)
+            doc_index.proper_names = proper_names
+        return doc_index.proper_names
+
+    def get_proper_name_suffixes(self, doc: Doc) -> tuple:
+        """Returns two dictionaries from every character suffix of the proper name texts,
+        respectively lemmas, of *doc* to the sorted indexes of the tokens heading the
+        names that end with it.
+        """
+        doc_index = self.get_doc_index(doc)
+        if doc_index.proper_name_text_suffixes is None:
+            text_suffixes = {}
+            lemma_suffixes = {}
+            for index, proper_name in self.get_proper_names(doc).items():
+                for suffixes, name in (
+                    (text_suffixes, proper_name.text), (lemma_suffixes, proper_name.lemma)
+                ):
+                    for start in range(len(name)):
+                        suffixes.setdefault(name[start:], []).append(index)
+            doc_index.proper_name_text_suffixes = text_suffixes
+            doc_index.proper_name_lemma_suffixes = lemma_suffixes
+        return doc_index.proper_name_text_suffixes, doc_index.proper_name_lemma_suffixes
+
+    def get_proper_name_antecedents(self, referring: Token) -> list:
+        """Returns the sorted indexes of the tokens preceding *referring* whose proper name
+        ends with the proper name of *referring*, e.g. 'Emmanuel Macron' for 'Macron'.
+        """
+        proper_name = self.get_proper_names(referring.doc).get(referring.i)
+        if proper_name is None:
+            return []
+        text_suffixes, lemma_suffixes = self.get_proper_name_suffixes(referring.doc)
+        return sorted(
+            index
+            for index in set(text_suffixes.get(proper_name.text, ())).union(
+                lemma_suffixes.get(proper_name.lemma, ()))
+            if index < referring.i
+        )
+
+    def _get_propn_subtree(self, token:Token) -> list:
         """ Returns a list containing each member M of the subtree of *token* that are proper nouns
             and where all the tokens between M and *token* are themselves proper nouns. If *token*
             is itself not a proper noun or if the head of *token* is a proper noun, an empty list
@@ -901,20 +2200,25 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         """"Has to be edited for french as the titles are parsed as heads of the propn 
         (and are those titles also included in named entities)
         """
+        lexicon = self.lexicon
+        person_titles = lexicon.person_titles
+        lower_lemmas = self.get_token_features(token.doc).lower_lemmas
+
         def is_propn_part(token:Token) -> bool:
-            if token.lemma_.lower() not in self.person_titles and \
+            if lower_lemmas[token.i] not in person_titles and \
                 token.text[0].upper() != token.text[0] and\
                 re.search("\W", token.text):
                 return False
-            return token.pos_ in self.propn_pos or \
-                 (token.lemma_.lower() in self.person_titles and token.pos_ in self.noun_pos)
+            return token.pos in lexicon.propn_pos_ids or \
+                 (lower_lemmas[token.i] in person_titles and token.pos in lexicon.noun_pos_ids)
 
         if not is_propn_part(token):
             return []
-        if token.dep_ != self.root_dep and token.dep_ not in self.dependent_sibling_deps and \
+        if token.dep != lexicon.root_dep_id and \
+                token.dep not in lexicon.dependent_sibling_dep_ids and \
                 is_propn_part(token.head):
             return []
-        subtree = list(token.subtree)
+        subtree = self.get_subtree(token)
         before_start_index = -1
         after_end_index = sys.maxsize
         for subtoken in subtree:
@@ -927,6 +2231,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         return ([t for t in subtree if t.i > before_start_index and t.i < after_end_index])
 
     def is_potentially_referring_back_noun(self, token: Token) -> bool:
+        lexicon = self.lexicon
 
         if (
             self.is_potentially_definite(token)
@@ -934,10 +2239,10 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                 [
                     1
                     for c in token.children
-                    if c.pos_ not in self.term_operator_pos
-                    and c.dep_ not in self.conjunction_deps
-                    and c.dep_ not in self.dependent_sibling_deps
-                    and c.dep_ not in self.term_operator_dep
+                    if c.pos not in lexicon.term_operator_pos_ids
+                    and c.dep not in lexicon.conjunction_dep_ids
+                    and c.dep not in lexicon.dependent_sibling_dep_ids
+                    and c.dep not in lexicon.term_operator_dep_ids
                 ]
             )
             == 0
@@ -950,8 +2255,8 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                 [
                     1
                     for c in token.children
-                    if c.dep_ not in self.conjunction_deps
-                    and c.dep_ not in self.dependent_sibling_deps
+                    if c.dep not in lexicon.conjunction_dep_ids
+                    and c.dep not in lexicon.dependent_sibling_dep_ids
                 ]
             )
             == 0
@@ -960,10 +2265,60 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             )
         )
     def get_noun_core_lemma(self, token):
-        prefix = re.compile("^((vice)|(^ex)|(^co))-")
-        return prefix.sub("",token.lemma_).lower()
+        return self.get_token_features(token.doc).core_lemmas[token.i]
+
+    def get_noun_pair_buckets(self, doc: Doc) -> tuple:
+        """Returns two dictionaries bucketing the token indexes of *doc*, the first by core
+        lemma and the second by entity type.
+        """
+        doc_index = self.get_doc_index(doc)
+        if doc_index.noun_core_lemma_buckets is None:
+            noun_core_lemma_buckets = {}
+            entity_type_buckets = {}
+            for token in doc:
+                noun_core_lemma_buckets.setdefault(
+                    self.get_noun_core_lemma(token), []).append(token.i)
+                if token.ent_type_:
+                    entity_type_buckets.setdefault(token.ent_type_, []).append(token.i)
+            doc_index.noun_core_lemma_buckets = noun_core_lemma_buckets
+            doc_index.entity_type_buckets = entity_type_buckets
+        return doc_index.noun_core_lemma_buckets, doc_index.entity_type_buckets
+
+    def get_noun_pair_candidates(self, referring: Token) -> frozenset:
+        """Returns the indexes of the tokens *is_potential_coreferring_noun_pair()* could
+        return *True* for with *referring*, which are:
+
+        - its syntactic neighbours (head, head of head, children and siblings), for
+          appositions and copular structures;
+        - the tokens with the same core lemma;
+        - when *referring* is an entity noun ('l'entreprise'), the tokens in entities of its
+          type, or in any entity for persons;
+        - the proper names ending with the proper name of *referring*.
+        """
+        doc_index = self.get_doc_index(referring.doc)
+        noun_pair_candidates = doc_index.noun_pair_candidates.get(referring.i)
+        if noun_pair_candidates is not None:
+            return noun_pair_candidates
+        noun_core_lemma_buckets, entity_type_buckets = self.get_noun_pair_buckets(referring.doc)
+        referring_core_lemma = self.get_noun_core_lemma(referring)
+        candidates = set(noun_core_lemma_buckets.get(referring_core_lemma, ()))
+        head = referring.head
+        candidates.update((head.i, head.head.i))
+        candidates.update(child.i for child in referring.children)
+        candidates.update(child.i for child in head.children)
+        referring_entity_type = self.lexicon.entity_noun_types.get(referring_core_lemma)
+        if referring_entity_type == "PER":
+            for entity_type_bucket in entity_type_buckets.values():
+                candidates.update(entity_type_bucket)
+        elif referring_entity_type is not None:
+            candidates.update(entity_type_buckets.get(referring_entity_type, ()))
+        candidates.update(self.get_proper_name_antecedents(referring))
+        noun_pair_candidates = frozenset(candidates)
+        doc_index.noun_pair_candidates[referring.i] = noun_pair_candidates
+        return noun_pair_candidates
 
     def is_grammatically_compatible_noun_pair(self, referred : Token, referring:Token):
+        lexicon = self.lexicon
         (
             referred_masc,
             referred_fem,
@@ -979,13 +2334,13 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
   
         if not (
             (referred_plur and referring_plur) or (referred_sing and referring_sing)
-        ) and not (referred.ent_type_ == "LOC" and referred.lemma_.upper() in self.plural_toponyms):
+        ) and not (referred.ent_type_ == "LOC" and referred.lemma_.upper() in lexicon.plural_toponyms):
             # two nouns with different numbers can't corefer. This is true for substantives and propn alike
             return False
         
 
-        if (referred.ent_type_ == 'PER' or self.get_noun_core_lemma(referred) in self.person_titles) and \
-            not (referring.pos_ == 'NOUN' and self.get_noun_core_lemma(referring) in self.mixed_gender_person_roles):
+        if (referred.ent_type_ == 'PER' or self.get_noun_core_lemma(referred) in lexicon.person_titles) and \
+            not (referring.pos_ == 'NOUN' and self.get_noun_core_lemma(referring) in lexicon.mixed_gender_person_roles):
             # Gender compatibility is only ensured for person and their roles
             # And only when the role does not allow mixed gender
             # "Sophie... l'auteur du livre'" is possible
@@ -995,7 +2350,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
                 ):
                 return False
         if (
-            self.has_morph(referring, "Gender","Masc") and 
+            self.has_packed_morph(referring, "Gender", "Masc") and 
             referring_fem and not referred_fem
             ):
             # when fem gender is enforced by det
@@ -1010,36 +2365,56 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         allow the two nouns to corefer
         '''
         #Nouns can't corefer in same predication
-        verb_referred_ancestors = [t for t in referred.ancestors \
-            if t.dep_ == 'ROOT' or t.pos_ in self.clause_root_pos]
-        verb_referring_ancestors = [t for t in referring.ancestors \
-            if t.dep_ == 'ROOT' or t.pos_ in self.clause_root_pos]
-        referred_verb_parent = verb_referred_ancestors[0] if verb_referred_ancestors else referred
-        referring_verb_parent = verb_referring_ancestors[0] if verb_referring_ancestors else referring
+        clause_roots = self.get_clause_roots(referring.doc)
         # Covers cases of unrecognised appos
-        if referred_verb_parent == referring_verb_parent and\
+        if clause_roots[referred.i] == clause_roots[referring.i] and\
              referring.dep_ != "xcomp" :
             return False
 
-        for appos_token in [referred, referring]:
-            #Prevents any non Propn from appos chain from connecting to other nouns
-            # That way we ensure that only the propn will be linked to the bigger chains
-            # E.g : "Justin Trudeau.... Le Président, Donald Trump". 
-            # We don't want "president" to be able to be linked to "Justin"
-            appos_children = [c for c in appos_token.children if c.dep_ == "appos"]
-            if (
-                any(1 for propn in appos_children 
-                if propn.pos_ == "PROPN" or propn.ent_type_)
-                and 
-                appos_token.pos_ != "PROPN" and not appos_token.ent_type_
-            ):
-                return False
-
-            if appos_token.pos_ != "PROPN" and appos_token.dep_ == "appos" and \
-                not appos_token.ent_type_ and \
-                (appos_token.head.pos_ == "PROPN" or appos_token.ent_type_):
-                return False
+        # Prevents any non Propn from appos chain from connecting to other nouns,
+        # see get_appos_chain_members()
+        appos_chain_members = self.get_appos_chain_members(referring.doc)
+        if appos_chain_members[referred.i] or appos_chain_members[referring.i]:
+            return False
         return True
+
+    def get_clause_roots(self, doc: Doc) -> np.ndarray:
+        """Returns for every token of *doc* the index of its first ancestor that is the
+        root or a verb, or its own index if there is none: two nouns with the same clause
+        root are in the same predication.
+        """
+        doc_index = self.get_doc_index(doc)
+        if doc_index.clause_roots is None:
+            lexicon = self.lexicon
+            clause_roots = self.get_nearest_matching_ancestors(
+                doc, lexicon.clause_root_pos_ids, lexicon.root_dep_ids).copy()
+            no_clause_root = clause_roots < 0
+            clause_roots[no_clause_root] = np.flatnonzero(no_clause_root)
+            doc_index.clause_roots = clause_roots
+        return doc_index.clause_roots
+
+    def get_appos_chain_members(self, doc: Doc) -> np.ndarray:
+        """Returns for every token of *doc* whether it is a common noun within an appos
+        chain that names somebody or something, i.e. whether it has an 'appos' child that is
+        a proper noun or an entity or is itself the 'appos' child of a proper noun. Only the
+        proper noun of such a chain may be linked to the nouns outside the chain.
+        E.g : "Justin Trudeau.... Le Président, Donald Trump".
+        We don't want "president" to be able to be linked to "Justin"
+        """
+        doc_index = self.get_doc_index(doc)
+        if doc_index.appos_chain_members is None:
+            appos_chain_members = np.zeros(len(doc), dtype=bool)
+            for token in doc:
+                if token.dep_ != "appos" or token.head.i == token.i:
+                    continue
+                head = token.head
+                if (token.pos_ == "PROPN" or token.ent_type_) and \
+                        head.pos_ != "PROPN" and not head.ent_type_:
+                    appos_chain_members[head.i] = True
+                if token.pos_ != "PROPN" and not token.ent_type_ and head.pos_ == "PROPN":
+                    appos_chain_members[token.i] = True
+            doc_index.appos_chain_members = appos_chain_members
+        return doc_index.appos_chain_members
         
     def language_dependent_is_coreferring_noun_pair(self,
          referred: Token, referring: Token) -> bool:
@@ -1064,7 +2439,7 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
             
             *_, referred_sing , referred_plur = self.get_gender_number_info(referred)
             if referred_sing and not referred_plur and\
-                self.has_morph(referred.head, "Number","Sing"):
+                self.has_packed_morph(referred.head, "Number", "Sing"):
                 return True
         # Copular structures
         if referring == referred.head and \
@@ -1089,80 +2464,125 @@ class LanguageSpecificRulesAnalyzer(RulesAnalyzer):
         already returned *True* for both *referred* and *referring* and that
         *referred* precedes *referring* within the document.
         """
+        if self.rule_stats is None and self.rule_trace is None:
+            return self.get_coreferring_noun_pair_decision(referred, referring)[0]
+        return self.record_rule_decision("is_potential_coreferring_noun_pair", referring.doc,
+            self.get_coreferring_noun_pair_decision, referred, referring)
+
+    def score_coreferring_noun_pairs(self, referring: Token, referreds: list) -> np.ndarray:
+        """Returns an array holding *is_potential_coreferring_noun_pair(referred, referring)*
+        (0 or 1) for each token of *referreds*. The first checks, which can only reject a
+        pair, are run on all tokens at once on the token feature table, and only the
+        remaining pairs go through the other checks.
+        """
+        scores = np.zeros(len(referreds), dtype=np.int8)
+        if len(referreds) == 0:
+            return scores
+        if self.rule_stats is not None or self.rule_trace is not None:
+            # every pair is to be recorded
+            for position, referred in enumerate(referreds):
+                scores[position] = self.is_potential_coreferring_noun_pair(referred, referring)
+            return scores
+        features = self.get_token_features(referring.doc)
+        noun_pos_ids = self.lexicon.noun_pos_ids
+        if referring.pos not in noun_pos_ids and not features.has_det[referring.i]:
+            return scores
+        referred_indexes = np.fromiter(
+            (referred.i for referred in referreds), dtype=np.int64, count=len(referreds))
+        remaining = features.has_det[referred_indexes] | np.fromiter(
+            (referred.pos in noun_pos_ids for referred in referreds),
+            dtype=bool, count=len(referreds))
+        if len(referring.text) == 1:
+            # get rid of copyright signs etc.
+            remaining &= np.fromiter((len(referred.text) != 1 for referred in referreds),
+                dtype=bool, count=len(referreds))
+        if self.use_noun_pair_candidate_buckets:
+            candidates = self.get_noun_pair_candidates(referring)
+            remaining &= np.fromiter((referred.i in candidates for referred in referreds),
+                dtype=bool, count=len(referreds))
+        for position in np.flatnonzero(remaining).tolist():
+            scores[position] = self.get_coreferring_noun_pair_decision(
+                referreds[position], referring)[0]
+        return scores
+
+    def get_coreferring_noun_pair_decision(self, referred: Token, referring: Token) -> tuple:
+        """Returns the result of *is_potential_coreferring_noun_pair()* along with the name
+        of the rule branch that decided it, see *RuleStats*.
+        """
         if len(referred.text) == 1 and len(referring.text) == 1:
-            return False  # get rid of copyright signs etc.
+            return False, "single_characters"  # get rid of copyright signs etc.
 
-        if (referred.pos_ not in self.noun_pos and not self.has_det(referred))\
-            or (referring.pos_ not in self.noun_pos and not self.has_det(referring)):
-            return False
+        if self.use_noun_pair_candidate_buckets and \
+                referred.i not in self.get_noun_pair_candidates(referring):
+            return False, "noun_pair_candidates"
+
+        noun_pos_ids = self.lexicon.noun_pos_ids
+        if (referred.pos not in noun_pos_ids and not self.has_det(referred))\
+            or (referring.pos not in noun_pos_ids and not self.has_det(referring)):
+            return False, "not_noun"
         grammatically_compatible= self.is_grammatically_compatible_noun_pair(referred,referring)
         # Needs to be here as it covers cases of incorrect parsing
         if self.language_dependent_is_coreferring_noun_pair(referred, referring) and\
             grammatically_compatible:
-            return True
+            return True, "language_dependent"
 
         if referring in referred._.coref_chains.temp_dependent_siblings:
-            return False
+            return False, "dependent_siblings"
 
         if (
             referring._.coref_chains.temp_governing_sibling is not None
             and referring._.coref_chains.temp_governing_sibling
             == referred._.coref_chains.temp_governing_sibling
         ):
-            return False
+            return False, "same_governing_sibling"
 
         # If *referred* and *referring* are names that potentially consist of several words,
         # the text of *referring* must correspond to the end of the text of *referred*
         # e.g. 'Richard Paul Hudson' -> 'Hudson'
-        referred_propn_subtree = self.get_propn_subtree(referred)
-        if referring in referred_propn_subtree:
-            return False
-        if len(referred_propn_subtree) > 0:
-            referring_propn_subtree = self.get_propn_subtree(referring)
-            if len(referring_propn_subtree) > 0 and " ".join(
-                t.text for t in referred_propn_subtree
-            ).endswith(" ".join(t.text for t in referring_propn_subtree)):
-                return True
-            if len(referring_propn_subtree) > 0 and " ".join(
-                t.lemma_.lower() for t in referred_propn_subtree
-            ).endswith(" ".join(t.lemma_.lower() for t in referring_propn_subtree)):
-                return True
+        proper_names = self.get_proper_names(referred.doc)
+        referred_proper_name = proper_names.get(referred.i)
+        if referred_proper_name is not None:
+            if referring.i in referred_proper_name.token_indexes:
+                return False, "same_proper_name"
+            referring_proper_name = proper_names.get(referring.i)
+            if referring_proper_name is not None and (
+                referred_proper_name.text.endswith(referring_proper_name.text)
+                or referred_proper_name.lemma.endswith(referring_proper_name.lemma)
+            ):
+                return True, "proper_name_suffix"
 
         if not self.is_potential_coreferring_pair_with_substantive(referred, referring):
-            return False
+            return False, "same_predication"
         # e.g. 'Peugeot' -> 'l'entreprise'
-        new_reverse_entity_noun_dictionary = {
-            noun: "PER" for noun in self.person_roles
-        } | self.reverse_entity_noun_dictionary
+        referring_entity_type = self.lexicon.entity_noun_types.get(
+            self.get_noun_core_lemma(referring))
 
         if (
-                self.get_noun_core_lemma(referring) in new_reverse_entity_noun_dictionary
+                referring_entity_type is not None
                 and self.is_potentially_definite(referring)  and 
                 (
                     (
-                    referred.ent_type_ ==
-                    new_reverse_entity_noun_dictionary[self.get_noun_core_lemma(referring)]
+                    referred.ent_type_ == referring_entity_type
                     )
                     or 
                     (
-                    new_reverse_entity_noun_dictionary[self.get_noun_core_lemma(referring)]
-                    == "PER"
+                    referring_entity_type == "PER"
                     and referred.ent_type_ and self.refers_to_person(referred)
                     )
                 ) 
                 and grammatically_compatible
                 and not (referring.ent_type_ != "" and referring.pos_ != "PROPN")
             ):
-            return True
+            return True, "entity_noun"
         
         if not self.is_potentially_referring_back_noun(referring):
-            return False
+            return False, "not_referring_back"
         if not self.is_potentially_introducing_noun(
             referred
         ) and not self.is_potentially_referring_back_noun(referred):
-            return False
+            return False, "not_introducing"
         if self.get_noun_core_lemma(referred) == self.get_noun_core_lemma(referring)\
             and referred.morph.get(self.number_morph_key) == \
                 referring.morph.get(self.number_morph_key):
-            return True
-        return False
+            return True, "same_core_lemma"
+        return False, "different_core_lemma"
@@ -0,0 +1,140 @@
+# Copyright 2021 msg systems ag
+# Modifications Copyright 2021 Valentin-Gabriel Soumah
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+from types import MappingProxyType
+from spacy.strings import get_string_id
+
+
+def freeze(words) -> frozenset:
+    """Returns *words* as a frozenset of interned strings."""
+    return frozenset(sys.intern(word) for word in words)
+
+
+def get_ids(tags) -> frozenset:
+    """Returns the ids of *tags* as found in *token.pos* and *token.dep*."""
+    return frozenset(get_string_id(tag) for tag in tags)
+
+
+class PhraseTrie:
+    """Character trie of lowercased phrases, matched against the tokens of a doc in a
+    single pass by *match()*. A phrase matches the tokens whose text, joined with their
+    whitespace, is the phrase once lowercased, provided there are as many tokens as words
+    in the phrase.
+    """
+
+    def __init__(self, phrases):
+        self.root = {}
+        for phrase in phrases:
+            phrase = phrase.lower()
+            node = self.root
+            for character in phrase:
+                node = node.setdefault(character, {})
+            # the end of a phrase is marked with the numbers of words of its phrases
+            node[None] = node.get(None, frozenset()) | {len(phrase.split())}
+
+    def match(self, doc) -> list:
+        """Returns a list of booleans telling for each token of *doc* whether it is part
+        of one of the phrases.
+        """
+        matched = [False] * len(doc)
+        lower_texts = [token.text.lower() for token in doc]
+        for start in range(len(doc)):
+            node = self.root
+            for index in range(start, len(doc)):
+                for character in lower_texts[index]:
+                    node = node.get(character)
+                    if node is None:
+                        break
+                else:
+                    if index - start + 1 in node.get(None, ()):
+                        matched[start:index + 1] = [True] * (index - start + 1)
+                    for character in doc[index].whitespace_:
+                        node = node.get(character)
+                        if node is None:
+                            break
+                if node is None:
+                    break
+        return matched
+
+
+class FrenchLexicon:
+    """Frozen view of every word list the french rules look up.
+
+    The data files are loaded by coreferee as plain lists after the rules analyzer
+    has been created, so the lexicon is compiled from the analyzer the first time
+    the rules need it. Membership tests then cost a hash lookup instead of a scan
+    over the lists (some of which hold thousands of names).
+    If the word lists of the analyzer are edited, *compile_lexicon()* has to be
+    called on the analyzer again.
+
+    The part of speech and dependency tuples of the analyzer are compiled along with the
+    word lists into sets of ids (*..._ids*) to be compared with *token.pos* and *token.dep*
+    rather than with the strings of *token.pos_* and *token.dep_*.
+    """
+
+    def __init__(self, rules_analyzer):
+        self.male_names = freeze(rules_analyzer.male_names)
+        self.female_names = freeze(rules_analyzer.female_names)
+        self.first_names = self.male_names | self.female_names
+        self.toponym_first_names = freeze(rules_analyzer.toponym_first_names)
+        self.person_roles = freeze(rules_analyzer.person_roles)
+        self.mixed_gender_person_roles = freeze(rules_analyzer.mixed_gender_person_roles)
+        # nouns that denote a person, whether generic ('homme') or a role ('ministre')
+        self.person_nouns = freeze(rules_analyzer.entity_noun_dictionary["PER"]) | \
+            self.person_roles
+        self.person_titles = freeze(rules_analyzer.person_titles)
+        self.plural_toponyms = freeze(rules_analyzer.plural_toponyms)
+        self.blacklisted_nouns = freeze(rules_analyzer.blacklisted_nouns)
+        self.blacklisted_phrases = tuple(rules_analyzer.blacklisted_phrases)
+        self.blacklisted_phrase_trie = PhraseTrie(self.blacklisted_phrases)
+        self.verbs_with_personal_subject = freeze(rules_analyzer.verbs_with_personal_subject)
+        self.avalent_verbs = freeze(rules_analyzer.avalent_verbs)
+        self.weather_words = freeze(rules_analyzer.weather_words)
+        # lowercased noun -> entity type it can refer to, e.g. 'entreprise' -> 'ORG'.
+        # The nouns added by the user override the dictionary, which overrides the roles.
+        entity_noun_types = {noun: "PER" for noun in rules_analyzer.person_roles}
+        entity_noun_types.update(rules_analyzer.reverse_entity_noun_dictionary)
+        for entity_type, nouns in (rules_analyzer.additional_entity_nouns or {}).items():
+            entity_noun_types.update((noun.lower(), entity_type) for noun in nouns)
+        self.entity_noun_types = MappingProxyType(
+            {sys.intern(noun): entity_type for noun, entity_type in entity_noun_types.items()})
+
+        self.noun_pos_ids = get_ids(rules_analyzer.noun_pos)
+        # coreferee declares *propn_pos* as a single tag rather than a tuple
+        propn_pos = rules_analyzer.propn_pos
+        self.propn_pos_ids = get_ids((propn_pos,) if isinstance(propn_pos, str) else propn_pos)
+        self.clause_root_pos_ids = get_ids(rules_analyzer.clause_root_pos)
+        self.term_operator_pos_ids = get_ids(rules_analyzer.term_operator_pos)
+        self.noun_adj_pos_ids = self.noun_pos_ids | get_ids(("ADJ",))
+        self.noun_adj_pron_pos_ids = self.noun_adj_pos_ids | get_ids(("PRON",))
+        # heads of the clauses the cataphora rule looks for
+        self.clause_pos_ids = self.clause_root_pos_ids | self.noun_adj_pos_ids
+        # parts of speech of the children carrying the definiteness of a noun
+        self.operator_pos_ids = self.term_operator_pos_ids | get_ids(("ADP",))
+        self.dependent_sibling_dep_ids = get_ids(rules_analyzer.dependent_sibling_deps)
+        self.conjunction_dep_ids = get_ids(rules_analyzer.conjunction_deps)
+        self.adverbial_clause_dep_ids = get_ids(rules_analyzer.adverbial_clause_deps)
+        self.term_operator_dep_ids = get_ids(rules_analyzer.term_operator_dep)
+        self.disjointed_dep_ids = get_ids(rules_analyzer.disjointed_dep)
+        self.root_dep_id = get_string_id(rules_analyzer.root_dep)
+        self.root_dep_ids = frozenset((self.root_dep_id,))
+        self.person_ent_type_id = get_string_id("PER")
+        self.non_person_ent_type_ids = get_ids(("ORG", "LOC", "MISC"))
+
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            raise AttributeError(" ".join(("FrenchLexicon is frozen:", name)))
+        super().__setattr__(name, value)
@@ -0,0 +1,206 @@
+# Copyright 2021 msg systems ag
+# Modifications Copyright 2021 Valentin-Gabriel Soumah
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import math
+import random
+import sys
+import weakref
+from collections import deque
+from spacy.tokens import Doc
+
+
+class RuleStats:
+    """Counts, for each rule and each of its named branches, how many decisions the branch
+    made, how many of them were rejections and the time spent in the calls it decided.
+    The time of a call includes the time of the nested rule calls it made, e.g. the
+    anaphoric pairs checked to resolve 'ce dernier'.
+    """
+
+    def __init__(self):
+        # (rule, branch) -> [decisions, rejections, seconds]
+        self.branches = {}
+
+    def record(self, rule: str, branch: str, rejected: bool, seconds: float) -> None:
+        branch_stats = self.branches.get((rule, branch))
+        if branch_stats is None:
+            branch_stats = self.branches[(rule, branch)] = [0, 0, 0.0]
+        branch_stats[0] += 1
+        if rejected:
+            branch_stats[1] += 1
+        branch_stats[2] += seconds
+
+    def merge(self, other: "RuleStats") -> None:
+        """Adds the counts of *other* to these counts."""
+        for (rule, branch), (decisions, rejections, seconds) in other.branches.items():
+            branch_stats = self.branches.setdefault((rule, branch), [0, 0, 0.0])
+            branch_stats[0] += decisions
+            branch_stats[1] += rejections
+            branch_stats[2] += seconds
+
+    def reset(self) -> None:
+        self.branches.clear()
+
+    def to_dict(self) -> dict:
+        """Returns the counts as *{rule: {branch: {"decisions": ..., "rejections": ...,
+        "seconds": ...}}}*.
+        """
+        rules = {}
+        for (rule, branch), (decisions, rejections, seconds) in sorted(self.branches.items()):
+            rules.setdefault(rule, {})[branch] = {
+                "decisions": decisions, "rejections": rejections, "seconds": seconds}
+        return rules
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_text(self) -> str:
+        """Returns one line per branch, the branches of each rule sorted by decreasing time."""
+        lines = []
+        for rule, branches in self.to_dict().items():
+            lines.append(rule)
+            for branch, branch_stats in sorted(
+                    branches.items(), key=lambda item: -item[1]["seconds"]):
+                lines.append("    {:<36}{:>10} decisions{:>10} rejections{:>12.6f} s".format(
+                    branch, branch_stats["decisions"], branch_stats["rejections"],
+                    branch_stats["seconds"]))
+        return "\n".join(lines)
+
+    def __str__(self) -> str:
+        return self.to_text()
+
+
+class RuleTrace:
+    """Keeps the decision paths of a sample of the rule calls in a ring buffer of at most
+    *max_records* records, the oldest records being dropped first, until they are flushed
+    to a JSONL file.
+
+    With *per_doc=False*, each call is sampled with probability *sampling_rate*; with
+    *per_doc=True*, each doc is, and then all the calls on it. At most
+    *max_records_per_doc* records are kept per doc. Between two sampled calls the trace
+    only counts down, so that its cost stays proportional to *sampling_rate*; the time
+    spent building the records is added up in *seconds*.
+    """
+
+    def __init__(
+        self, sampling_rate: float = 0.01, max_records: int = 10000, per_doc: bool = False,
+        max_records_per_doc: int = 1000, seed: int = None
+    ):
+        if not 0 <= sampling_rate <= 1:
+            raise ValueError(" ".join(("sampling_rate must be between 0 and 1:",
+                str(sampling_rate))))
+        self.sampling_rate = sampling_rate
+        self.per_doc = per_doc
+        self.max_records_per_doc = max_records_per_doc
+        self.records = deque(maxlen=max_records)
+        self.random = random.Random(seed)
+        self.sampled_calls = 0
+        self.dropped_calls = 0
+        self.seconds = 0.0
+        self._countdown = self._draw_countdown()
+        self._doc_ref = None
+        self._doc_sampled = False
+        self._doc_records = 0
+
+    def _draw_countdown(self) -> int:
+        """Returns the number of calls until the next sampled one, drawn from the
+        geometric distribution of parameter *sampling_rate*.
+        """
+        if self.sampling_rate >= 1:
+            return 1
+        if self.sampling_rate <= 0:
+            return sys.maxsize
+        return int(math.log(1.0 - self.random.random()) /
+            math.log(1.0 - self.sampling_rate)) + 1
+
+    def is_sampled(self, doc: Doc) -> bool:
+        """Returns whether the next rule call on *doc* is to be traced."""
+        if not self.per_doc:
+            self._countdown -= 1
+            if self._countdown > 0:
+                return False
+            self._countdown = self._draw_countdown()
+        if self._doc_ref is None or self._doc_ref() is not doc:
+            self._doc_ref = weakref.ref(doc)
+            self._doc_sampled = self.random.random() < self.sampling_rate
+            self._doc_records = 0
+        if self.per_doc and not self._doc_sampled:
+            return False
+        if self._doc_records >= self.max_records_per_doc:
+            self.dropped_calls += 1
+            return False
+        self._doc_records += 1
+        self.sampled_calls += 1
+        return True
+
+    def add(self, record: dict, seconds: float) -> None:
+        """Adds *record* to the buffer, *seconds* being the time it took to build it."""
+        self.records.append(record)
+        self.seconds += seconds
+
+    def flush(self, file) -> int:
+        """Appends the records to *file*, a path or a text file, one JSON object per line,
+        empties the buffer and returns the number of records written.
+        """
+        if isinstance(file, str):
+            with open(file, "a", encoding="utf8") as jsonl_file:
+                return self.flush(jsonl_file)
+        count = 0
+        while self.records:
+            file.write(json.dumps(self.records.popleft(), ensure_ascii=False))
+            file.write("\n")
+            count += 1
+        return count
+
+
+class CandidateBudgetStats:
+    """Counts the anaphors whose candidate referreds were cut down to the candidate budget
+    (see *anaphor_candidate_budget*): *anaphors* anaphors had *candidates* candidates in
+    all, of which *kept_candidates* were kept; *budget_hits* anaphors had more candidates
+    than the budget, at most *max_candidates*.
+    """
+
+    def __init__(self):
+        self.anaphors = 0
+        self.budget_hits = 0
+        self.candidates = 0
+        self.kept_candidates = 0
+        self.max_candidates = 0
+
+    def record(self, candidates: int, kept_candidates: int) -> None:
+        self.anaphors += 1
+        if kept_candidates < candidates:
+            self.budget_hits += 1
+        self.candidates += candidates
+        self.kept_candidates += kept_candidates
+        if candidates > self.max_candidates:
+            self.max_candidates = candidates
+
+    def to_dict(self) -> dict:
+        return {
+            "anaphors": self.anaphors, "budget_hits": self.budget_hits,
+            "candidates": self.candidates, "kept_candidates": self.kept_candidates,
+            "max_candidates": self.max_candidates}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_text(self) -> str:
+        return "{} anaphors, budget hit for {}, {} candidates, {} kept, at most {} per " \
+            "anaphor".format(self.anaphors, self.budget_hits, self.candidates,
+                self.kept_candidates, self.max_candidates)
+
+    def __str__(self) -> str:
+        return self.to_text()
@@ -14,6 +14,10 @@
 # limitations under the License.
 
 import unittest
+import gc
+import io
+import json
+import weakref
 import spacy
 import coreferee
 from coreferee.rules import RulesAnalyzerFactory
@@ -1319,3 +1323,669 @@ class FrenchRulesTest(unittest.TestCase):
         self.compare_potential_noun_pair(test_text,
         21, 39, True,
         )
+
+
+    def test_lexicon_compiled_from_word_lists(self):
+        for rules_analyzer in self.rules_analyzers:
+            lexicon = rules_analyzer.lexicon
+            self.assertIs(lexicon, rules_analyzer.lexicon)
+            self.assertIsInstance(lexicon.first_names, frozenset)
+            self.assertEqual(set(rules_analyzer.male_names) | set(rules_analyzer.female_names),
+                lexicon.first_names)
+            self.assertTrue(lexicon.person_nouns.issuperset(rules_analyzer.person_roles))
+            self.assertTrue(lexicon.person_nouns.issuperset(
+                rules_analyzer.entity_noun_dictionary["PER"]))
+            with self.assertRaises(AttributeError):
+                lexicon.male_names = frozenset()
+
+    def test_lexicon_recompiled_after_edit(self):
+        nlp = self.nlps[0]
+        rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+        doc = nlp('Je vois le zorglub.')
+        rules_analyzer.initialize(doc)
+        self.assertFalse(rules_analyzer.refers_to_person(doc[3]))
+        rules_analyzer.person_roles = rules_analyzer.person_roles + [doc[3].lemma_.lower()]
+        rules_analyzer.compile_lexicon()
+        self.assertTrue(rules_analyzer.refers_to_person(doc[3]))
+
+    def test_predicate_cache(self):
+
+        def func(nlp):
+            doc = nlp('Richard rentra et il cria')
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            rules_analyzer.initialize(doc)
+            cache_info = rules_analyzer.get_doc_index(doc).predicate_cache_info()
+            self.assertLessEqual(cache_info['is_potential_anaphor']['misses'], len(doc))
+            self.assertTrue(rules_analyzer.is_potential_anaphor(doc[3]))
+            self.assertFalse(rules_analyzer.is_independent_noun(doc[3]))
+            new_cache_info = rules_analyzer.get_doc_index(doc).predicate_cache_info()
+            for predicate in ('is_potential_anaphor', 'is_independent_noun'):
+                self.assertEqual(cache_info[predicate]['misses'],
+                    new_cache_info[predicate]['misses'], nlp.meta['name'])
+                self.assertEqual(cache_info[predicate]['hits'] + 1,
+                    new_cache_info[predicate]['hits'], nlp.meta['name'])
+            doc_ref = weakref.ref(doc)
+            del doc
+            gc.collect()
+            self.assertIsNone(doc_ref(), nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_gender_number_matrix(self):
+
+        def func(nlp):
+            doc = nlp('La ministre et Jean parlent à leurs amis. Il les voit.')
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            rules_analyzer.initialize(doc)
+            matrix = rules_analyzer.get_gender_number_matrix(doc)
+            self.assertEqual((2, len(doc), 4), matrix.shape, nlp.meta['name'])
+            # the determiner decides the gender of 'ministre'
+            self.assertEqual([False, True, True, False], matrix[1, 1].tolist(), nlp.meta['name'])
+            for token in doc:
+                for directly in (False, True):
+                    self.assertEqual(
+                        rules_analyzer._get_gender_number_info(token, directly=directly),
+                        tuple(matrix[int(directly), token.i]), nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def compare_agreement_mask(self, doc_text, referring_index, referreds, expected_mask, *,
+        excluded_nlps=[], directly=True):
+
+        def func(nlp):
+
+            if nlp.meta['name'] in excluded_nlps:
+                return
+            doc = nlp(doc_text)
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            rules_analyzer.initialize(doc)
+            referring = doc[referring_index]
+            mentions = [Mention(doc[index], include_dependent_siblings) for
+                index, include_dependent_siblings in referreds]
+            mask = rules_analyzer.get_anaphoric_agreement_mask(referring, mentions, directly)
+            self.assertEqual(expected_mask, mask.tolist(), nlp.meta['name'])
+            for mention, agrees in zip(mentions, mask):
+                if not agrees:
+                    self.assertEqual(0, rules_analyzer.is_potential_anaphoric_pair(
+                        mention, referring, directly), nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_agreement_mask_singular(self):
+        self.compare_agreement_mask('L\'homme et la femme arrivent. Il parle', 7,
+            [(1, False), (4, False), (1, True)], [True, False, False])
+
+    def test_agreement_mask_plural(self):
+        self.compare_agreement_mask('L\'homme et la femme arrivent. Ils parlent', 7,
+            [(1, False), (4, False), (1, True)], [False, False, True])
+
+    def test_last_compatible_noun(self):
+
+        def func(nlp):
+            doc = nlp('Le président du pays est arrivé. Ce dernier parle.')
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            rules_analyzer.initialize(doc)
+            last_compatible_noun = rules_analyzer.get_last_compatible_noun(doc[8])
+            self.assertEqual(1, last_compatible_noun[0], nlp.meta['name'])
+            # 'pays' modifies 'président' so 'ce dernier' can refer to both nouns
+            self.assertEqual(frozenset((1, 3)), last_compatible_noun[1], nlp.meta['name'])
+            self.assertIs(last_compatible_noun,
+                rules_analyzer.get_last_compatible_noun(doc[8]), nlp.meta['name'])
+            self.assertEqual([1, 3], rules_analyzer.get_independent_noun_indexes(doc),
+                nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_independent_noun_counts(self):
+
+        def func(nlp):
+            doc = nlp('Le président du pays est arrivé. Celui-là parle à sa femme.')
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            rules_analyzer.initialize(doc)
+            noun_indexes = rules_analyzer.get_independent_noun_indexes(doc)
+            self.assertEqual([1, 3], noun_indexes[:2], nlp.meta['name'])
+            for token in doc:
+                self.assertEqual(len([index for index in noun_indexes if index < token.i]),
+                    rules_analyzer.get_noun_phrase_ordinal(token), nlp.meta['name'])
+            self.assertEqual(2, rules_analyzer.count_independent_nouns(doc, 0, 7),
+                nlp.meta['name'])
+            self.assertEqual(1, rules_analyzer.count_independent_nouns(doc, 2, 7),
+                nlp.meta['name'])
+            self.assertEqual(0, rules_analyzer.count_independent_nouns(doc, 7, 2),
+                nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_entity_noun_types(self):
+
+        def func(nlp):
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            entity_noun_types = rules_analyzer.lexicon.entity_noun_types
+            self.assertEqual('ORG', entity_noun_types['entreprise'], nlp.meta['name'])
+            self.assertEqual('PER', entity_noun_types['homme'], nlp.meta['name'])
+            with self.assertRaises(TypeError):
+                entity_noun_types['entreprise'] = 'LOC'
+            doc = nlp('Peugeot a annoncé des résultats. Le constructeur est satisfait.')
+            rules_analyzer.initialize(doc)
+            self.assertFalse(rules_analyzer.is_potential_coreferring_noun_pair(doc[0], doc[7]),
+                nlp.meta['name'])
+            additional_entity_nouns = rules_analyzer.additional_entity_nouns
+            try:
+                rules_analyzer.add_entity_nouns('ORG', ['Constructeur'])
+                self.assertEqual('ORG', rules_analyzer.lexicon.entity_noun_types['constructeur'],
+                    nlp.meta['name'])
+                self.assertTrue(rules_analyzer.is_potential_coreferring_noun_pair(doc[0], doc[7]),
+                    nlp.meta['name'])
+            finally:
+                rules_analyzer.additional_entity_nouns = additional_entity_nouns
+                rules_analyzer.compile_lexicon()
+
+        self.all_nlps(func)
+
+    def test_clause_labels(self):
+
+        def func(nlp):
+            doc = nlp('Pierre pense que Marie se lave.')
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            rules_analyzer.initialize(doc)
+            clause_heads, relative_clause_heads, has_selon_case = \
+                rules_analyzer.get_clause_labels(doc)
+            self.assertEqual(5, clause_heads[4], nlp.meta['name'])
+            self.assertEqual(1, clause_heads[5], nlp.meta['name'])
+            self.assertEqual(rules_analyzer.NO_CLAUSE_HEAD, clause_heads[1], nlp.meta['name'])
+            self.assertEqual((), relative_clause_heads[4], nlp.meta['name'])
+            self.assertFalse(any(has_selon_case), nlp.meta['name'])
+            self.assertTrue(rules_analyzer.is_potential_reflexive_pair(Mention(doc[3]), doc[4]),
+                nlp.meta['name'])
+            self.assertFalse(rules_analyzer.is_potential_reflexive_pair(Mention(doc[0]), doc[4]),
+                nlp.meta['name'])
+            self.assertEqual(2, rules_analyzer.is_reflexive_anaphor(doc[4]), nlp.meta['name'])
+            self.assertEqual(0, rules_analyzer.is_reflexive_anaphor(doc[3]), nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_ancestor_indexes(self):
+
+        def func(nlp):
+            doc = nlp('Quand il est arrivé, Pierre a souri. Il pense que Marie viendra.')
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            rules_analyzer.initialize(doc)
+            depths = rules_analyzer.get_depths(doc)
+            sentence_indexes = rules_analyzer.get_sentence_indexes(doc)
+            for token in doc:
+                ancestor_indexes = rules_analyzer.get_ancestor_indexes(token)
+                self.assertEqual([ancestor.i for ancestor in token.ancestors],
+                    list(ancestor_indexes), nlp.meta['name'])
+                self.assertEqual(token.head.i, rules_analyzer.get_heads(doc)[token.i],
+                    nlp.meta['name'])
+                self.assertEqual(len(ancestor_indexes), depths[token.i], nlp.meta['name'])
+                self.assertEqual(0 if token.i < 9 else 1, sentence_indexes[token.i],
+                    nlp.meta['name'])
+            self.assertTrue(rules_analyzer.is_potential_cataphoric_pair(Mention(doc[5]), doc[1]),
+                nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_proper_name_antecedents(self):
+
+        def func(nlp):
+            doc = nlp('Emmanuel Macron est arrivé à Paris. Macron a parlé.')
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            rules_analyzer.initialize(doc)
+            proper_names = rules_analyzer.get_proper_names(doc)
+            referred_index = [index for index in proper_names
+                if 1 in proper_names[index].token_indexes][0]
+            self.assertEqual('Emmanuel Macron', proper_names[referred_index].text,
+                nlp.meta['name'])
+            self.assertIn(referred_index, rules_analyzer.get_proper_name_antecedents(doc[8]),
+                nlp.meta['name'])
+            self.assertNotIn(5, rules_analyzer.get_proper_name_antecedents(doc[8]),
+                nlp.meta['name'])
+            self.assertEqual([], rules_analyzer.get_proper_name_antecedents(doc[2]),
+                nlp.meta['name'])
+            self.assertTrue(rules_analyzer.is_potential_coreferring_noun_pair(
+                doc[referred_index], doc[8]), nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_noun_pair_candidates(self):
+
+        def func(nlp):
+            doc = nlp('Le chien de Paul aboie. Peugeot a vendu une voiture. Le chien dort '
+                'et l\'entreprise est contente.')
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            rules_analyzer.initialize(doc)
+            chien_candidates = rules_analyzer.get_noun_pair_candidates(doc[13])
+            self.assertIn(1, chien_candidates, nlp.meta['name'])
+            self.assertNotIn(10, chien_candidates, nlp.meta['name'])
+            entreprise_candidates = rules_analyzer.get_noun_pair_candidates(doc[17])
+            if doc[6].ent_type_ == 'ORG':
+                self.assertIn(6, entreprise_candidates, nlp.meta['name'])
+            self.assertNotIn(1, entreprise_candidates, nlp.meta['name'])
+            for referring in (doc[13], doc[17]):
+                for referred in doc[:referring.i]:
+                    if rules_analyzer.is_independent_noun(referred) and \
+                            rules_analyzer.is_potential_coreferring_noun_pair(referred, referring):
+                        self.assertIn(referred.i,
+                            rules_analyzer.get_noun_pair_candidates(referring), nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_token_features(self):
+
+        def func(nlp):
+            doc = nlp('Le président de la société mange. Il le regarde.')
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            rules_analyzer.initialize(doc)
+            token_features = rules_analyzer.get_token_features(doc)
+            self.assertIs(token_features, rules_analyzer.get_token_features(doc),
+                nlp.meta['name'])
+            for token in doc:
+                self.assertEqual(token.lemma_.lower(), token_features.lower_lemmas[token.i],
+                    nlp.meta['name'])
+                self.assertEqual(any(child.dep_ == 'det' for child in token.children),
+                    token_features.has_det[token.i], nlp.meta['name'])
+            self.assertEqual('société', rules_analyzer.get_noun_core_lemma(doc[4]),
+                nlp.meta['name'])
+            self.assertFalse(token_features.is_french_word[6], nlp.meta['name'])
+            self.assertTrue(token_features.is_french_word[7], nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_packed_morph(self):
+
+        def func(nlp):
+            doc = nlp('Ils se lavent avec leurs savons. Cette femme est la sienne.')
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            for token in doc:
+                for tag, value in rules_analyzer.morph_encoder.bits:
+                    self.assertEqual(rules_analyzer.has_morph(token, tag, value),
+                        rules_analyzer.has_packed_morph(token, tag, value),
+                        ' '.join((nlp.meta['name'], token.text, tag, str(value))))
+            # features that are not encoded are read from the spaCy morphology
+            self.assertIsNone(rules_analyzer.morph_encoder.get_bit('Tense', 'Pres'))
+            self.assertEqual(rules_analyzer.has_morph(doc[2], 'Tense', 'Pres'),
+                rules_analyzer.has_packed_morph(doc[2], 'Tense', 'Pres'), nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_tag_ids(self):
+
+        def func(nlp):
+            doc = nlp('Pierre et Marie mangent une pomme verte.')
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            lexicon = rules_analyzer.lexicon
+            for token in doc:
+                self.assertEqual(token.pos_ in rules_analyzer.noun_pos,
+                    token.pos in lexicon.noun_pos_ids, nlp.meta['name'])
+                self.assertEqual(token.pos_ in rules_analyzer.clause_root_pos,
+                    token.pos in lexicon.clause_root_pos_ids, nlp.meta['name'])
+                self.assertEqual(token.dep_ in rules_analyzer.dependent_sibling_deps,
+                    token.dep in lexicon.dependent_sibling_dep_ids, nlp.meta['name'])
+                self.assertEqual(token.dep_ in rules_analyzer.conjunction_deps,
+                    token.dep in lexicon.conjunction_dep_ids, nlp.meta['name'])
+                self.assertEqual(token.dep_ in rules_analyzer.term_operator_dep,
+                    token.dep in lexicon.term_operator_dep_ids, nlp.meta['name'])
+                self.assertEqual(token.dep_ == rules_analyzer.root_dep,
+                    token.dep == lexicon.root_dep_id, nlp.meta['name'])
+                self.assertEqual(token.pos_ == 'PROPN',
+                    token.pos in lexicon.propn_pos_ids, nlp.meta['name'])
+            self.assertEqual('PROPN', doc[0].pos_, nlp.meta['name'])
+            self.assertIn(doc[0].pos, lexicon.propn_pos_ids, nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_conjunction_index(self):
+
+        def func(nlp):
+            doc = nlp('Pierre, Paul ou Jean viendront. Le chat et le chien dorment.')
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            rules_analyzer.initialize(doc)
+            governors, sibling_starts, sibling_indexes, has_or = \
+                rules_analyzer.get_conjunction_index(doc)
+            self.assertEqual([2, 4],
+                sibling_indexes[sibling_starts[0]:sibling_starts[1]].tolist(), nlp.meta['name'])
+            self.assertEqual([0, 0, 0], governors[[2, 3, 4]].tolist(), nlp.meta['name'])
+            self.assertTrue(has_or[0], nlp.meta['name'])
+            self.assertFalse(has_or[8], nlp.meta['name'])
+            self.assertEqual('[Paul, Jean]', str(rules_analyzer.get_dependent_siblings(doc[0])),
+                nlp.meta['name'])
+            self.assertEqual([], rules_analyzer.get_dependent_siblings(doc[2]), nlp.meta['name'])
+            self.assertFalse(rules_analyzer.is_involved_in_non_or_conjunction(doc[2]),
+                nlp.meta['name'])
+            self.assertTrue(rules_analyzer.is_involved_in_non_or_conjunction(doc[8]),
+                nlp.meta['name'])
+            self.assertTrue(rules_analyzer.is_involved_in_non_or_conjunction(doc[11]),
+                nlp.meta['name'])
+            self.assertFalse(rules_analyzer.is_involved_in_non_or_conjunction(doc[12]),
+                nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_blacklisted_phrases(self):
+
+        def func(nlp):
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            doc = nlp('Il a acheté une Pomme de terre au marché.')
+            rules_analyzer.initialize(doc)
+            self.assertTrue(rules_analyzer.is_independent_noun(doc[4]), nlp.meta['name'])
+            self.assertFalse(rules_analyzer.is_in_blacklisted_phrase(doc[4]), nlp.meta['name'])
+            blacklisted_phrases = rules_analyzer.blacklisted_phrases
+            try:
+                rules_analyzer.add_blacklisted_phrases(['pomme de terre'])
+                self.assertEqual([False] * 4 + [True] * 3 + [False] * 3,
+                    [rules_analyzer.is_in_blacklisted_phrase(token) for token in doc],
+                    nlp.meta['name'])
+                self.assertFalse(rules_analyzer.is_independent_noun(doc[4]), nlp.meta['name'])
+                self.assertTrue(rules_analyzer.is_independent_noun(doc[8]), nlp.meta['name'])
+            finally:
+                rules_analyzer.blacklisted_phrases = blacklisted_phrases
+                rules_analyzer.compile_lexicon()
+
+        self.all_nlps(func)
+
+    def test_subtree_edges(self):
+
+        def func(nlp):
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            doc = nlp('Le frère de Marie a vendu sa maison à un voisin.')
+            rules_analyzer.initialize(doc)
+            left_edges, right_edges, sizes, _ = rules_analyzer.get_subtree_edges(doc)
+            for token in doc:
+                subtree = list(token.subtree)
+                self.assertEqual(subtree, rules_analyzer.get_subtree(token), nlp.meta['name'])
+                self.assertEqual((token.left_edge.i, token.right_edge.i, len(subtree)),
+                    (left_edges[token.i], right_edges[token.i], sizes[token.i]),
+                    nlp.meta['name'])
+                for other_token in doc:
+                    self.assertEqual(other_token in subtree,
+                        rules_analyzer.is_in_subtree(other_token, token), nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_ancestor_table(self):
+
+        def func(nlp):
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            doc = nlp('Le frère de Marie a vendu la maison que son père avait construite. Il est parti.')
+            rules_analyzer.initialize(doc)
+            for token in doc:
+                ancestors = list(token.ancestors)
+                self.assertEqual(ancestors[0] if ancestors else None,
+                    rules_analyzer.get_nearest_ancestor_matching(token, frozenset(),
+                        frozenset(ancestor.dep for ancestor in ancestors)),
+                    nlp.meta['name'])
+                for other_token in doc:
+                    self.assertEqual(other_token in ancestors,
+                        rules_analyzer.is_ancestor(other_token, token), nlp.meta['name'])
+                    common_ancestors = [ancestor for ancestor in [token] + ancestors
+                        if ancestor == other_token or ancestor in other_token.ancestors]
+                    self.assertEqual(common_ancestors[0] if common_ancestors else None,
+                        rules_analyzer.get_lowest_common_ancestor(token, other_token),
+                        nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_clause_roots_and_appos_chains(self):
+
+        def func(nlp):
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            doc = nlp('Le président, Donald Trump, a dit que le ministre avait quitté la ville.')
+            rules_analyzer.initialize(doc)
+            clause_roots = rules_analyzer.get_clause_roots(doc)
+            appos_chain_members = rules_analyzer.get_appos_chain_members(doc)
+            for token in doc:
+                verb_ancestors = [ancestor for ancestor in token.ancestors
+                    if ancestor.dep_ == 'ROOT' or ancestor.pos_ in ('VERB', 'AUX')]
+                self.assertEqual(verb_ancestors[0].i if verb_ancestors else token.i,
+                    clause_roots[token.i], nlp.meta['name'])
+                self.assertEqual(
+                    token.pos_ != 'PROPN' and not token.ent_type_ and (
+                        any(child.pos_ == 'PROPN' or child.ent_type_
+                            for child in token.children if child.dep_ == 'appos')
+                        or token.dep_ == 'appos' and token.head.pos_ == 'PROPN'),
+                    appos_chain_members[token.i], nlp.meta['name'])
+            self.assertNotEqual(clause_roots[1], clause_roots[10], nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_rule_stats(self):
+
+        def func(nlp):
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            self.assertIsNone(rules_analyzer.rule_stats, nlp.meta['name'])
+            try:
+                rule_stats = rules_analyzer.enable_rule_stats()
+                doc = nlp('Pierre a vu Marie. Il lui a parlé de sa maison.')
+                rules_analyzer.initialize(doc)
+                self.assertTrue(rules_analyzer.is_potential_anaphor(doc[5]), nlp.meta['name'])
+                self.assertFalse(rules_analyzer.is_potential_anaphoric_pair(
+                    Mention(doc[3]), doc[5], directly=True), nlp.meta['name'])
+                doc_stats = rules_analyzer.get_doc_rule_stats(doc).to_dict()
+                self.assertIn('potential_anaphor', doc_stats['is_potential_anaphor'],
+                    nlp.meta['name'])
+                self.assertGreaterEqual(doc_stats['is_potential_anaphoric_pair']
+                    ['gender_number']['rejections'], 1, nlp.meta['name'])
+                self.assertEqual(rule_stats.to_dict(), json.loads(rule_stats.to_json()),
+                    nlp.meta['name'])
+                self.assertIn('gender_number', rule_stats.to_text(), nlp.meta['name'])
+            finally:
+                rules_analyzer.disable_rule_stats()
+
+        self.all_nlps(func)
+
+    def test_anaphoric_pair_stage_orders(self):
+
+        def func(nlp):
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            doc = nlp('Le ministre a parlé à Marie. Celle-ci lui a dit que la ville était à elle.')
+            rules_analyzer.initialize(doc)
+            pairs = [(Mention(referred), referring) for referring in doc
+                if rules_analyzer.is_potential_anaphor(referring)
+                for referred in doc[:referring.i] if rules_analyzer.is_independent_noun(referred)]
+            results = [rules_analyzer.is_potential_anaphoric_pair(referred, referring, directly)
+                for referred, referring in pairs for directly in (True, False)]
+            declared_stages = rules_analyzer.anaphoric_pair_stages
+            try:
+                rules_analyzer.anaphoric_pair_stages = tuple(reversed(declared_stages))
+                self.assertEqual(results, [rules_analyzer.is_potential_anaphoric_pair(
+                    referred, referring, directly) for referred, referring in pairs
+                    for directly in (True, False)], nlp.meta['name'])
+                stage_stats = rules_analyzer.profile_anaphoric_pair_stages()
+                self.assertEqual(results, [rules_analyzer.is_potential_anaphoric_pair(
+                    referred, referring, directly) for referred, referring in pairs
+                    for directly in (True, False)], nlp.meta['name'])
+                self.assertEqual(2 * len(pairs), stage_stats.to_dict()
+                    ['is_potential_anaphoric_pair']['gender_number']['decisions'],
+                    nlp.meta['name'])
+                stages = rules_analyzer.order_anaphoric_pair_stages()
+                self.assertEqual(sorted(declared_stages), sorted(stages), nlp.meta['name'])
+                self.assertEqual(results, [rules_analyzer.is_potential_anaphoric_pair(
+                    referred, referring, directly) for referred, referring in pairs
+                    for directly in (True, False)], nlp.meta['name'])
+            finally:
+                rules_analyzer.stop_profiling_anaphoric_pair_stages()
+                rules_analyzer.anaphoric_pair_stages = declared_stages
+
+        self.all_nlps(func)
+
+    def test_rule_trace(self):
+
+        def func(nlp):
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            self.assertIsNone(rules_analyzer.rule_trace, nlp.meta['name'])
+            try:
+                rule_trace = rules_analyzer.enable_rule_trace(sampling_rate=1.0, max_records=5)
+                doc = nlp('Pierre a vu Marie. Il lui a parlé de sa maison.')
+                rules_analyzer.initialize(doc)
+                self.assertEqual(0, rules_analyzer.is_potential_anaphoric_pair(
+                    Mention(doc[3]), doc[5], directly=True), nlp.meta['name'])
+                self.assertEqual(5, len(rule_trace.records), nlp.meta['name'])
+                record = rule_trace.records[-1]
+                self.assertEqual('is_potential_anaphoric_pair', record['rule'], nlp.meta['name'])
+                self.assertEqual('gender_number', record['branch'], nlp.meta['name'])
+                self.assertEqual(['gender_number', 0], record['stages'][-1], nlp.meta['name'])
+                self.assertEqual([{'i': [3], 'text': 'Marie'}, {'i': 5, 'text': 'Il'}],
+                    record['tokens'], nlp.meta['name'])
+                self.assertFalse(record['uncertain'], nlp.meta['name'])
+                jsonl_file = io.StringIO()
+                self.assertEqual(5, rule_trace.flush(jsonl_file), nlp.meta['name'])
+                self.assertEqual(0, len(rule_trace.records), nlp.meta['name'])
+                self.assertEqual(record, json.loads(jsonl_file.getvalue().splitlines()[-1]),
+                    nlp.meta['name'])
+                rule_trace = rules_analyzer.enable_rule_trace(sampling_rate=0.0)
+                rules_analyzer.initialize(nlp('Pierre a vu Marie. Il lui a parlé.'))
+                self.assertEqual(0, rule_trace.sampled_calls, nlp.meta['name'])
+            finally:
+                rules_analyzer.disable_rule_trace()
+
+        self.all_nlps(func)
+
+    def test_anaphor_candidate_budget(self):
+
+        def func(nlp):
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            try:
+                candidate_budget_stats = rules_analyzer.set_anaphor_candidate_budget(2)
+                doc = nlp('Pierre, Paul, Jacques, Marie et Julie sont venus. Il est content.')
+                rules_analyzer.initialize(doc)
+                candidate_indexes = rules_analyzer.get_anaphor_candidate_indexes(doc[12])
+                self.assertEqual([0, 2, 4, 6, 8], candidate_indexes.tolist(), nlp.meta['name'])
+                dropped_indexes = rules_analyzer.get_dropped_candidate_indexes(doc[12])
+                self.assertEqual(3, len(dropped_indexes), nlp.meta['name'])
+                for index in dropped_indexes:
+                    self.assertEqual(0, rules_analyzer.is_potential_anaphoric_pair(
+                        Mention(doc[index]), doc[12], directly=True), nlp.meta['name'])
+                doc_stats = rules_analyzer.get_doc_candidate_budget_stats(doc)
+                self.assertGreaterEqual(doc_stats.budget_hits, 1, nlp.meta['name'])
+                self.assertEqual(5, doc_stats.max_candidates, nlp.meta['name'])
+                self.assertGreaterEqual(candidate_budget_stats.budget_hits, 1, nlp.meta['name'])
+                # the candidates left out under the previous budget are dropped
+                rules_analyzer.set_anaphor_candidate_budget(4)
+                self.assertEqual(1, len(rules_analyzer.get_dropped_candidate_indexes(doc[12])),
+                    nlp.meta['name'])
+                self.assertEqual(1, rules_analyzer.get_doc_candidate_budget_stats(doc).anaphors,
+                    nlp.meta['name'])
+                for budget in (0, -1):
+                    with self.assertRaises(ValueError):
+                        rules_analyzer.set_anaphor_candidate_budget(budget)
+                self.assertEqual(4, rules_analyzer.anaphor_candidate_budget, nlp.meta['name'])
+            finally:
+                rules_analyzer.set_anaphor_candidate_budget(None)
+
+        self.all_nlps(func)
+
+    def test_batched_pair_scores(self):
+
+        def func(nlp):
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            doc = nlp('Le ministre et sa femme ont vu Pierre. Ils lui ont dit que celui-ci partirait.')
+            rules_analyzer.initialize(doc)
+            nouns = [token for token in doc if rules_analyzer.is_independent_noun(token)]
+            for referring in (token for token in doc
+                    if rules_analyzer.is_potential_anaphor(token)):
+                referreds = [Mention(token) for token in doc if token.i != referring.i]
+                for directly in (True, False):
+                    self.assertEqual([rules_analyzer.is_potential_anaphoric_pair(
+                        referred, referring, directly) for referred in referreds],
+                        rules_analyzer.score_anaphoric_pairs(
+                            referring, referreds, directly).tolist(), nlp.meta['name'])
+            for position, referring in enumerate(nouns):
+                self.assertEqual([int(rules_analyzer.is_potential_coreferring_noun_pair(
+                    referred, referring)) for referred in nouns[:position]],
+                    rules_analyzer.score_coreferring_noun_pairs(
+                        referring, nouns[:position]).tolist(), nlp.meta['name'])
+            self.assertEqual([], rules_analyzer.score_anaphoric_pairs(
+                doc[9], [], True).tolist(), nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_candidate_windows(self):
+
+        def func(nlp):
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            doc = nlp('Pierre est arrivé. Marie est partie. Le chat dort. Le chien aboie. '
+                'La maison est vide. Il pleut. Elle les a vus.')
+            rules_analyzer.initialize(doc)
+            sentences = list(doc.sents)
+            sentence_starts = rules_analyzer.get_sentence_starts(doc)
+            self.assertEqual([sentence.start for sentence in sentences] + [len(doc)],
+                sentence_starts.tolist(), nlp.meta['name'])
+            self.assertEqual([sentence_index for sentence_index, sentence
+                in enumerate(sentences) for _ in sentence],
+                rules_analyzer.get_sentence_indexes(doc).tolist(), nlp.meta['name'])
+            referable_indexes = rules_analyzer.get_referable_indexes(doc)
+            anaphor_indexes, window_starts, window_ends = \
+                rules_analyzer.get_anaphor_candidate_windows(doc)
+            self.assertIn(doc[-5].i, anaphor_indexes.tolist(), nlp.meta['name'])
+            distance = rules_analyzer.maximum_anaphora_sentence_referential_distance
+            for position, anaphor_index in enumerate(anaphor_indexes.tolist()):
+                sentence_index = sentences.index(doc[anaphor_index].sent)
+                window_start = sentences[max(sentence_index - distance, 0)].start
+                expected_indexes = [index for index in referable_indexes.tolist()
+                    if window_start <= index < doc[anaphor_index].sent.end]
+                self.assertEqual(expected_indexes, referable_indexes[
+                    window_starts[position]:window_ends[position]].tolist(),
+                    nlp.meta['name'])
+                self.assertEqual([index for index in expected_indexes
+                    if index != anaphor_index], rules_analyzer.get_anaphor_candidate_indexes(
+                    doc[anaphor_index]).tolist(), nlp.meta['name'])
+            self.assertNotIn(0, rules_analyzer.get_anaphor_candidate_indexes(doc[-5]).tolist(),
+                nlp.meta['name'])
+            noun_indexes, window_starts, window_ends = \
+                rules_analyzer.get_noun_candidate_windows(doc)
+            distance = rules_analyzer.maximum_coreferring_nouns_sentence_referential_distance
+            for position, noun_index in enumerate(noun_indexes.tolist()):
+                sentence_index = sentences.index(doc[noun_index].sent)
+                window_start = sentences[max(sentence_index - distance, 0)].start
+                self.assertEqual([index for index in noun_indexes.tolist()
+                    if window_start <= index < noun_index], noun_indexes[
+                    window_starts[position]:window_ends[position]].tolist(), nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_refers_to_person_with_short_verb_lemma(self):
+
+        def func(nlp):
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            for verb_lemma in ('e', ''):
+                doc = spacy.tokens.Doc(nlp.vocab, words=['Truc', 'e'], heads=[1, 1],
+                    deps=['nsubj', 'ROOT'], pos=['NOUN', 'VERB'], lemmas=['truc', verb_lemma])
+                self.assertFalse(rules_analyzer.refers_to_person(doc[0]), nlp.meta['name'])
+                keys = rules_analyzer.get_agreement_buckets(doc, True)[0]
+                self.assertNotIn(None, [key[4] for key in keys], nlp.meta['name'])
+
+        self.all_nlps(func)
+
+    def test_agreement_buckets(self):
+
+        def func(nlp):
+            rules_analyzer = RulesAnalyzerFactory.get_rules_analyzer(nlp)
+            doc = nlp('Le ministre et sa femme ont vu Pierre à Paris. Il y est resté.')
+            rules_analyzer.initialize(doc)
+            keys, bucket_ids, bucket_indexes = rules_analyzer.get_agreement_buckets(doc, True)
+            self.assertEqual(rules_analyzer.get_referable_indexes(doc).tolist(),
+                sorted(index for indexes in bucket_indexes for index in indexes.tolist()),
+                nlp.meta['name'])
+            for position, indexes in enumerate(bucket_indexes):
+                self.assertEqual([position] * len(indexes), bucket_ids[indexes].tolist(),
+                    nlp.meta['name'])
+            il = next(token for token in doc if token.text == 'Il')
+            femme = next(token for token in doc if token.text == 'femme')
+            self.assertNotIn(femme.i, rules_analyzer.get_agreeing_candidate_indexes(
+                il, True).tolist(), nlp.meta['name'])
+            for referring in (token for token in doc
+                    if rules_analyzer.is_potential_anaphor(token)):
+                for directly in (True, False):
+                    agreeing_indexes = rules_analyzer.get_agreeing_candidate_indexes(
+                        referring, directly).tolist()
+                    candidate_indexes = rules_analyzer.get_anaphor_candidate_indexes(
+                        referring).tolist()
+                    self.assertEqual([], [index for index in agreeing_indexes
+                        if index not in candidate_indexes], nlp.meta['name'])
+                    for index in candidate_indexes:
+                        if index not in agreeing_indexes:
+                            self.assertEqual(0, rules_analyzer.is_potential_anaphoric_pair(
+                                Mention(doc[index]), referring, directly), nlp.meta['name'])
+
+        self.all_nlps(func)
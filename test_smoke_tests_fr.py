@@ -43,6 +43,15 @@ class FrenchSmokeTest(unittest.TestCase):
                 self.assertTrue(expected_coref_chains == chains_representation or
                     alternative_expected_coref_chains == chains_representation, nlp.meta['name'])
 
+            # the noun pair candidate buckets must not change the chains
+            rules_analyzer = nlp.get_pipe('coreferee').annotator.rules_analyzer
+            rules_analyzer.use_noun_pair_candidate_buckets = True
+            try:
+                self.assertEqual(chains_representation, str(nlp(doc_text)._.coref_chains),
+                    nlp.meta['name'])
+            finally:
+                rules_analyzer.use_noun_pair_candidate_buckets = False
+
         self.all_nlps(func)
 
     def test_simple(self):
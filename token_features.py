@@ -0,0 +1,87 @@
+# Copyright 2021 msg systems ag
+# Modifications Copyright 2021 Valentin-Gabriel Soumah
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+import numpy as np
+from spacy.tokens import Doc, Token
+
+# first character of the lemma of a proper noun that is not a name, e.g. 'mars' for 'Mars'
+LOWERCASE_INITIAL = re.compile("[^A-ZÂÊÎÔÛÄËÏÖÜÀÆÇÉÈŒÙ]")
+
+# prefixes left out of the lemma of a noun when comparing nouns: 'vice-président'
+NOUN_CORE_LEMMA_PREFIX = re.compile("^((vice)|(^ex)|(^co))-")
+
+
+class MorphEncoder:
+    """Packs the values of the morphological features given as *features* (feature ->
+    values) into one integer per token. Each value has its own bit and each feature has an
+    extra "any" bit set whenever the feature is present, whatever its value.
+    Morphologies are encoded once per distinct morphology.
+    """
+
+    def __init__(self, features: dict):
+        self.bits = {}
+        for feature, values in features.items():
+            self.bits[(feature, None)] = 1 << len(self.bits)
+            for value in values:
+                self.bits[(feature, value)] = 1 << len(self.bits)
+        self.encoded_morphs = {}
+
+    def get_bit(self, feature: str, value: str = None) -> int:
+        """Returns the bit of *value* for *feature* (of any value if *value* is *None*),
+        or *None* if it is not encoded.
+        """
+        return self.bits.get((feature, value))
+
+    def encode(self, token: Token) -> int:
+        morph_mask = self.encoded_morphs.get(token.morph.key)
+        if morph_mask is None:
+            morph_mask = 0
+            for feature, values in token.morph.to_dict().items():
+                any_bit = self.bits.get((feature, None))
+                if any_bit is None:
+                    continue
+                morph_mask |= any_bit
+                for value in values.split(","):
+                    morph_mask |= self.bits.get((feature, value), 0)
+            self.encoded_morphs[token.morph.key] = morph_mask
+        return morph_mask
+
+
+class TokenFeatureTable:
+    """Struct of arrays holding the facts about the tokens of a doc that the rules read
+    most often, filled in one pass over the doc so that the rules do not go through
+    spaCy attribute access and string operations again and again.
+
+    *lower_lemmas* and *core_lemmas* hold the lowercased lemmas and the core lemmas (see
+    *NOUN_CORE_LEMMA_PREFIX*), *morph_masks* the morphologies packed by *morph_encoder*.
+    """
+
+    def __init__(self, doc: Doc, french_word: re.Pattern, morph_encoder: MorphEncoder):
+        length = len(doc)
+        self.lower_lemmas = [token.lemma_.lower() for token in doc]
+        self.core_lemmas = [
+            NOUN_CORE_LEMMA_PREFIX.sub("", token.lemma_).lower() for token in doc]
+        self.morph_masks = [morph_encoder.encode(token) for token in doc]
+        self.is_french_word = np.fromiter(
+            (french_word.match(token.text) is not None for token in doc),
+            dtype=bool, count=length)
+        self.is_lowercase_propn = np.fromiter(
+            (token.pos_ == "PROPN" and LOWERCASE_INITIAL.match(token.lemma_) is not None
+                for token in doc), dtype=bool, count=length)
+        self.has_det = np.zeros(length, dtype=bool)
+        for token in doc:
+            if token.dep_ == "det" and token.head.i != token.i:
+                self.has_det[token.head.i] = True